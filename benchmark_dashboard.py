@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Dashboard Benchmark - Time the dashboard's queries against growing libraries.
+
+Usage:
+    python benchmark_dashboard.py [--sizes 100 1000 10000 100000] [--runs N]
+
+For each library size, seeds one user into a throwaway SQLite database
+and times what the dashboard does on every load: the practice list behind
+GET / for a weekday and for a weekend day (which adds random picks), and
+the stats shown with it, including the difficulty, monthly and heatmap
+requests the page makes right after. The stats cache is cleared before
+every run, so each one pays for its queries. It never touches the
+configured database.
+
+Problems are solved at a steady --per-day rate, so a bigger library is
+an older one and each practice interval's day holds about the same number
+of problems at every size. Times should stay flat as the library grows;
+only weekend picks walk the user's problems up to a random position.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+PHASES = ('weekday', 'weekend', 'stats')
+
+
+def _seed_library(problem_count: int, per_day: int, seed: int) -> int:
+    """Insert one user with problem_count problems and their practice history. Returns the user ID."""
+    from extensions import db
+    from models import User, Problem, ProblemHistory
+    from repositories import DailyActivityRepository, ProblemCountRepository
+    from services import PracticeService
+    
+    rng = random.Random(seed)
+    utc_now = datetime.utcnow()
+    db.session.execute(User.__table__.insert(), [{
+        'id': 1,
+        'username': 'bench',
+        'email': 'bench@example.invalid',
+        'password_hash': 'x',
+        'timezone': 'UTC',
+        'stats_version': 0,
+        'created_at': utc_now,
+    }])
+    
+    problems = []
+    history = []
+    for i in range(problem_count):
+        solved_date = utc_now - timedelta(days=i // per_day, minutes=rng.randrange(24 * 60))
+        practiced = [
+            solved_date + timedelta(days=days)
+            for days in PracticeService.PRACTICE_INTERVALS
+            if solved_date + timedelta(days=days) <= utc_now and rng.random() < 0.5
+        ]
+        problems.append({
+            'id': i + 1,
+            'user_id': 1,
+            'title': f'Problem {i}',
+            'leetcode_url': f'https://leetcode.com/problems/bench-{i}/',
+            'difficulty': rng.choice(('easy', 'medium', 'hard')),
+            'solved_date': solved_date,
+            'created_at': solved_date,
+            'last_practiced': max(practiced, default=None),
+            'practice_count': len(practiced),
+        })
+        history.extend({'problem_id': i + 1, 'practiced_at': at} for at in practiced)
+    
+    for start in range(0, len(problems), 10000):
+        db.session.execute(Problem.__table__.insert(), problems[start:start + 10000])
+    for start in range(0, len(history), 10000):
+        db.session.execute(ProblemHistory.__table__.insert(), history[start:start + 10000])
+    db.session.commit()
+    DailyActivityRepository.rebuild(1)
+    ProblemCountRepository.rebuild(1)
+    return 1
+
+
+def _time_dashboard(user_id: int, runs: int) -> Dict[str, List[float]]:
+    """Time each phase of a dashboard load, cold, runs times."""
+    from services import PracticeService, StatsService
+    from services.stats_service import get_stats_cache
+    
+    today = datetime.utcnow().date()
+    # The latest Wednesday and Saturday, so every run times the same kind of day
+    days = {
+        'weekday': today - timedelta(days=(today.weekday() - 2) % 7),
+        'weekend': today - timedelta(days=(today.weekday() - 5) % 7),
+    }
+    timings = {phase: [] for phase in PHASES}
+    for _ in range(runs):
+        get_stats_cache().clear()
+        
+        for phase, local_day in days.items():
+            started = time.perf_counter()
+            PracticeService.get_scheduled_problems(user_id, local_day)
+            timings[phase].append(time.perf_counter() - started)
+        
+        started = time.perf_counter()
+        StatsService.get_practice_stats(user_id)
+        StatsService.get_difficulty_stats_by_period(user_id)
+        StatsService.get_monthly_practice_data(user_id, today.year, today.month)
+        StatsService.get_heatmap_data(user_id, today.year)
+        timings['stats'].append(time.perf_counter() - started)
+    return timings
+
+
+def run_benchmark(sizes: List[int], runs: int = 20, per_day: int = 3, seed: int = 0) -> Dict[int, Dict[str, float]]:
+    """
+    Time dashboard loads for each library size in its own throwaway database.
+    
+    Returns:
+        Mapping of library size to the median milliseconds of each phase.
+    """
+    from config import get_config
+    from daily_email_worker import create_worker_app
+    from extensions import db
+    
+    results = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix='dashboard-benchmark-') as tmp:
+            config_class = type('BenchmarkConfig', (get_config(),), {
+                'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'benchmark.db')}",
+                'EMAIL_OUTBOX_DISPATCH_IN_APP': False,
+            })
+            app = create_worker_app(config_class, migrate=True)
+            
+            with app.app_context():
+                seed_started = time.monotonic()
+                user_id = _seed_library(size, per_day, seed)
+                seed_seconds = time.monotonic() - seed_started
+                
+                timings = _time_dashboard(user_id, runs)
+                results[size] = {
+                    phase: statistics.median(values) * 1000 for phase, values in timings.items()
+                }
+                print(
+                    f"{size:>8} problems (seeded in {seed_seconds:.1f}s): "
+                    + ", ".join(f"{phase} {results[size][phase]:.2f}ms" for phase in PHASES)
+                )
+                
+                db.session.remove()
+                db.engine.dispose()
+    
+    smallest, largest = min(results), max(results)
+    for phase in PHASES:
+        ratio = results[largest][phase] / results[smallest][phase]
+        print(f"{phase}: {ratio:.2f}x from {smallest} to {largest} problems")
+    return results
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description='Time dashboard loads against growing problem libraries.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 100000],
+                        help='library sizes to seed')
+    parser.add_argument('--runs', type=int, default=20, help='timed dashboard loads per size (median reported)')
+    parser.add_argument('--per-day', type=int, default=3, help='problems solved per day in the synthetic history')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    
+    if args.runs < 1 or args.per_day < 1 or not args.sizes or min(args.sizes) < 1:
+        parser.error('--sizes, --runs and --per-day must be positive')
+    run_benchmark(sorted(set(args.sizes)), args.runs, args.per_day, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+"""
+CLI commands.
+
+Registered on the app in the factory, e.g.:
+    flask --app app rebuild-activity
+"""
+import click
+
+
+def register_commands(app):
+    """Register all CLI commands with the Flask app."""
+    app.cli.add_command(rebuild_activity)
+
+
+@click.command('rebuild-activity')
+@click.option('--user-id', type=int, default=None, help='Only rebuild this user.')
+def rebuild_activity(user_id):
+    """Rebuild the daily activity and problem counts rollups."""
+    from repositories import DailyActivityRepository, ProblemCountRepository
+    
+    rows = DailyActivityRepository.rebuild(user_id)
+    click.echo(f"Rebuilt daily activity ({rows} rows).")
+    rows = ProblemCountRepository.rebuild(user_id)
+    click.echo(f"Rebuilt problem counts ({rows} rows).")
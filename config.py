@@ -28,10 +28,44 @@ class Config:
     AVATAR_UPLOAD_DIR = os.path.join(BASE_DIR, 'static', 'uploads', 'avatars')
     ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp'}
     
+    # Leetcode scraper
+    SCRAPER_CACHE_DIR = os.getenv('SCRAPER_CACHE_DIR', os.path.join(INSTANCE_DIR, 'http_cache'))  # Empty to disable
+    PROBLEM_CATALOG_TTL_SECONDS = int(os.getenv('PROBLEM_CATALOG_TTL_SECONDS', 30 * 24 * 3600))  # Re-scrape shared problem metadata after this
+    
     # Brevo (email service)
     BREVO_API_KEY = os.getenv('BREVO_API_KEY', '')
     BREVO_FROM_EMAIL = os.getenv('BREVO_FROM_EMAIL', 'info@jobdistributor.net')
     BREVO_FROM_NAME = os.getenv('BREVO_FROM_NAME', 'CodingFlashcard')
+    BREVO_POOL_MAXSIZE = int(os.getenv('BREVO_POOL_MAXSIZE', 10))  # Kept-alive connections; >= DAILY_EMAIL_CONCURRENCY
+    BREVO_BATCH_SIZE = int(os.getenv('BREVO_BATCH_SIZE', 1000))  # Recipients per request (Brevo max 1000)
+    BREVO_API_HOST = os.getenv('BREVO_API_HOST', '')  # Override the API base URL, e.g. a local fake Brevo server
+    EMAIL_TRANSPORT = os.getenv('EMAIL_TRANSPORT', 'brevo')  # 'brevo', or 'null' to accept emails without sending
+    
+    # Daily email worker
+    DAILY_EMAIL_REFRESH_SECONDS = int(os.getenv('DAILY_EMAIL_REFRESH_SECONDS', 300))  # Max sleep between schedule refreshes
+    DAILY_EMAIL_CHANGE_CHECK_SECONDS = int(os.getenv('DAILY_EMAIL_CHANGE_CHECK_SECONDS', 15))  # Cheap check for earlier send times between refreshes
+    DAILY_EMAIL_RETRY_SECONDS = int(os.getenv('DAILY_EMAIL_RETRY_SECONDS', 60))  # Delay before retrying a failed send
+    DAILY_EMAIL_BATCH_SIZE = int(os.getenv('DAILY_EMAIL_BATCH_SIZE', 1000))  # Users leased per claim
+    DAILY_EMAIL_LEASE_SECONDS = int(os.getenv('DAILY_EMAIL_LEASE_SECONDS', 300))  # Must exceed time to send one batch
+    DAILY_EMAIL_CONCURRENCY = int(os.getenv('DAILY_EMAIL_CONCURRENCY', 8))  # Parallel sends per worker
+    DAILY_EMAIL_SEND_TIMEOUT = float(os.getenv('DAILY_EMAIL_SEND_TIMEOUT', 10))  # Seconds per Brevo request
+    DAILY_EMAIL_OVERDUE_SECONDS = int(os.getenv('DAILY_EMAIL_OVERDUE_SECONDS', 900))  # Emails due longer ago are backlog, sent after on-time ones
+    DAILY_EMAIL_CATCHUP_PER_MINUTE = int(os.getenv('DAILY_EMAIL_CATCHUP_PER_MINUTE', 6000))  # Backlog drain rate; 0 = no limit
+    DAILY_EMAIL_STALE_SECONDS = int(os.getenv('DAILY_EMAIL_STALE_SECONDS', 6 * 3600))  # Skip emails this late until the next send time; 0 = never
+    
+    # Transactional email outbox
+    EMAIL_OUTBOX_DISPATCH_IN_APP = os.getenv('EMAIL_OUTBOX_DISPATCH_IN_APP', 'true').lower() == 'true'  # Send from a web-process thread
+    EMAIL_OUTBOX_POLL_SECONDS = int(os.getenv('EMAIL_OUTBOX_POLL_SECONDS', 30))  # In-app dispatcher check for retries
+    EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 50))  # Emails leased per claim
+    EMAIL_OUTBOX_LEASE_SECONDS = int(os.getenv('EMAIL_OUTBOX_LEASE_SECONDS', 120))  # Before a dead dispatcher's emails are retried
+    EMAIL_OUTBOX_RETRY_SECONDS = int(os.getenv('EMAIL_OUTBOX_RETRY_SECONDS', 30))  # First retry delay, doubled per attempt
+    EMAIL_OUTBOX_MAX_RETRY_SECONDS = int(os.getenv('EMAIL_OUTBOX_MAX_RETRY_SECONDS', 3600))
+    EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 8))
+    EMAIL_OUTBOX_RETENTION_DAYS = int(os.getenv('EMAIL_OUTBOX_RETENTION_DAYS', 7))  # Sent emails are deleted after this
+    
+    # Stats cache (per process)
+    STATS_CACHE_MAX_ENTRIES = int(os.getenv('STATS_CACHE_MAX_ENTRIES', 2048))
+    STATS_CACHE_TTL_SECONDS = int(os.getenv('STATS_CACHE_TTL_SECONDS', 300))
     
     # URLs
     FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5000')
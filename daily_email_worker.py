@@ -3,100 +3,818 @@
 Daily Email Worker - Background process to send daily practice emails.
 
 Usage:
-    python daily_email_worker.py
+    python daily_email_worker.py [--migrate]
+    python daily_email_worker.py --dry-run [--limit N]
+    python daily_email_worker.py --benchmark [--users N] [--transport null|fake]
 
-This worker runs continuously and checks every minute if any users
-need to receive their daily practice email based on their timezone
-and preferred send time.
+This worker runs continuously and sleeps until the next user's daily
+practice email is due, based on their timezone and preferred send time.
+Send times changed in the web app are picked up within seconds; send
+SIGHUP to make it re-read the schedule immediately. It also retries
+transactional emails (password reset, email change) left in the outbox.
+
+Several workers can run at once (on one or more hosts sharing the
+database); each due user is leased to a single worker before sending.
+
+--dry-run shows who is due and what their emails would contain, without
+sending or writing anything. --benchmark seeds synthetic users into a
+throwaway database and times one full tick against the null transport or
+a local fake Brevo server; it never touches the configured database.
 """
+import argparse
+import contextlib
+import heapq
+import math
+import os
+import random
+import signal
+import socket
+import tempfile
+import threading
 import time
-from datetime import datetime
-from zoneinfo import ZoneInfo
+import tracemalloc
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple, List
+
+# Distinguishes restarted workers that reuse a pid
+_WORKER_TOKEN = uuid.uuid4().hex[:8]
+
+# Phases timed per tick
+PHASES = ('query', 'render', 'send', 'commit')
+
 
+@contextlib.contextmanager
+def _timed(phases: Dict[str, float], phase: str):
+    """Add the time spent in the block to phases[phase]."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[phase] += time.perf_counter() - started
 
-def send_daily_practice_emails():
+
+def send_daily_practice_emails(
+    worker_id: Optional[str] = None,
+    catchup_limit: Optional[int] = None
+) -> Dict[str, Any]:
     """
-    Send daily practice emails to eligible users.
+    Send daily practice emails to users whose email is due.
+    
+    Each user's next_email_due_at (UTC) is kept up to date by the settings
+    routes, by migrations for users enabled before it existed, and after
+    every send, so a tick only looks at due users.
+    
+    Due users are leased to this worker in batches before sending, so
+    several workers can share the load without emailing anyone twice.
+    Practice lists are built and results recorded on this thread; only
+    the Brevo requests, each carrying many recipients, run in the thread
+    pool. Each batch is marked sent with one UPDATE before sending and
+    sends that definitely failed are reverted with another, so a crash
+    or an unanswered request may skip a user's email for the day but
+    never sends it twice.
+    
+    After downtime, users due more than DAILY_EMAIL_OVERDUE_SECONDS ago
+    are backlog: they are sent only after every on-time user, at most
+    catchup_limit of them per tick, so a backlog never delays on-time
+    emails. Emails overdue by more than DAILY_EMAIL_STALE_SECONDS are
+    skipped until the user's next send time.
+    
+    Args:
+        worker_id: Lease owner (defaults to this process)
+        catchup_limit: Max overdue users to send to (defaults to all)
     
-    Checks each user with daily email enabled and sends if:
-    1. Current time in user's timezone is >= their preferred send time
-    2. Email hasn't been sent today (in user's timezone)
+    Returns:
+        dict with 'sent', 'failed', 'unknown' (sends that may have been
+        delivered), 'overdue' (backlog users claimed) and 'skipped' (stale)
+        counts, 'elapsed' seconds and 'phases', the
+        seconds spent in each of PHASES: query (leasing and practice
+        lists), render (building emails), send (Brevo requests, including
+        payload serialization) and commit (recording results).
     """
+    from flask import current_app
     from repositories import UserRepository
-    from services import PracticeService, EmailService
-    from extensions import db
     
+    app = current_app._get_current_object()
+    worker_id = worker_id or get_worker_id()
+    lease_seconds = app.config.get('DAILY_EMAIL_LEASE_SECONDS', 300)
+    batch_size = app.config.get('DAILY_EMAIL_BATCH_SIZE', 1000)
+    concurrency = app.config.get('DAILY_EMAIL_CONCURRENCY', 8)
+    overdue_seconds = app.config.get('DAILY_EMAIL_OVERDUE_SECONDS', 900)
     utc_now = datetime.utcnow()
-    users = UserRepository.get_users_with_daily_email_enabled()
+    overdue_before = utc_now - timedelta(seconds=overdue_seconds)
+    started = time.monotonic()
+    phases = dict.fromkeys(PHASES, 0.0)
+    sent = failed = unknown = overdue = 0
+    
+    with _timed(phases, 'commit'):
+        skipped = _skip_stale_emails(utc_now)
+    
+    # (due by, due from, max users): on-time users first, then the backlog
+    passes = [(utc_now, overdue_before, None), (overdue_before, None, catchup_limit)]
+    
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='daily-email') as pool:
+        for due_by, due_from, max_users in passes:
+            claimed = 0
+            while max_users is None or claimed < max_users:
+                limit = batch_size if max_users is None else min(batch_size, max_users - claimed)
+                with _timed(phases, 'query'):
+                    users = UserRepository.claim_daily_email_batch(
+                        worker_id, due_by, lease_seconds, limit, due_from=due_from
+                    )
+                if not users:
+                    break
+                claimed += len(users)
+                
+                batch_sent, batch_failed, batch_unknown = _send_batch(app, pool, worker_id, users, utc_now, phases)
+                sent += batch_sent
+                failed += batch_failed
+                unknown += batch_unknown
+            
+            if due_from is None:
+                overdue = claimed
+    
+    elapsed = time.monotonic() - started
+    if sent or failed or unknown:
+        print(
+            f"[{datetime.utcnow().isoformat()}] Tick: {sent} sent ({overdue} overdue), {failed} failed, "
+            f"{unknown} unknown "
+            f"in {elapsed:.2f}s ({sent / elapsed:.1f} emails/s; "
+            + ", ".join(f"{phase} {phases[phase]:.2f}s" for phase in PHASES) + ")"
+        )
+    
+    return {
+        'sent': sent,
+        'failed': failed,
+        'unknown': unknown,
+        'overdue': overdue,
+        'skipped': skipped,
+        'elapsed': elapsed,
+        'phases': phases,
+    }
+
+
+def _send_batch(app, pool, worker_id: str, users: list, utc_now: datetime, phases: Dict[str, float]) -> Tuple[int, int, int]:
+    """
+    Send the daily emails for a batch of users leased to worker_id.
+    
+    Returns:
+        Tuple of (sent, failed, unknown outcome) counts
+    """
+    from repositories import UserRepository
+    from services import EmailService
+    
+    concurrency = app.config.get('DAILY_EMAIL_CONCURRENCY', 8)
+    send_timeout = app.config.get('DAILY_EMAIL_SEND_TIMEOUT', 10)
+    retry_seconds = app.config.get('DAILY_EMAIL_RETRY_SECONDS', 60)
+    send_batch_size = min(
+        app.config.get('BREVO_BATCH_SIZE', 1000),
+        EmailService.BREVO_MAX_MESSAGE_VERSIONS
+    )
+    
+    prepared = _prepare_emails(users, utc_now, phases)
+    if not prepared:
+        return 0, 0, 0
+    
+    # Mark the whole batch sent before sending, so a crash mid-batch
+    # can never lead to a second email that day; definite failures are reverted
+    with _timed(phases, 'render'):
+        previous_sent_at = {user.id: user.daily_email_last_sent_at for user, _ in prepared}
+        next_due_at = _next_due_after_send([user for user, _ in prepared], utc_now)
+        recipients = [(user.id, email) for user, email in prepared]
+    with _timed(phases, 'commit'):
+        marked = set(UserRepository.mark_daily_emails_sent(worker_id, utc_now, next_due_at))
+    
+    # Users whose lease ran out before marking may belong to another worker now
+    lost = len(recipients) - len(marked)
+    if lost:
+        print(f"[{datetime.utcnow().isoformat()}] Lease expired for {lost} users before sending, skipping")
+        recipients = [(user_id, email) for user_id, email in recipients if user_id in marked]
+    
+    # Spread the batch over the pool, one Brevo request per chunk
+    with _timed(phases, 'send'):
+        chunk_size = max(1, min(send_batch_size, math.ceil(len(recipients) / concurrency)))
+        futures = {}
+        for i in range(0, len(recipients), chunk_size):
+            chunk = recipients[i:i + chunk_size]
+            future = pool.submit(
+                _dispatch_emails, app, [email for _, email in chunk], send_timeout
+            )
+            futures[future] = chunk
+        
+        sent, failed_ids, unknown = _collect_results(futures)
+    
+    if failed_ids:
+        with _timed(phases, 'commit'):
+            UserRepository.revert_daily_emails_sent(
+                {user_id: previous_sent_at[user_id] for user_id in failed_ids},
+                datetime.utcnow() + timedelta(seconds=retry_seconds)
+            )
+    return sent, len(failed_ids), unknown
+
+
+def _skip_stale_emails(utc_now: datetime) -> int:
+    """
+    Skip daily emails overdue by more than DAILY_EMAIL_STALE_SECONDS.
+    
+    Each stale user is moved on to their first send time inside the
+    staleness window, which may still be overdue but no longer stale.
+    
+    Returns:
+        Number of users skipped.
+    """
+    from flask import current_app
+    from repositories import UserRepository
+    from services import DailyEmailService
+    
+    stale_seconds = current_app.config.get('DAILY_EMAIL_STALE_SECONDS', 6 * 3600)
+    batch_size = current_app.config.get('DAILY_EMAIL_BATCH_SIZE', 1000)
+    if not stale_seconds:
+        return 0
     
+    stale_before = utc_now - timedelta(seconds=stale_seconds)
+    skipped = 0
+    while True:
+        users = UserRepository.get_stale_daily_email_users(stale_before, batch_size)
+        if not users:
+            break
+        
+        due_by_cohort = {}
+        next_due_at = {}
+        for user in users:
+            cohort = ((user.timezone or 'UTC').strip(), user.daily_email_time)
+            if cohort not in due_by_cohort:
+                due_by_cohort[cohort] = DailyEmailService.compute_next_send_after(user, stale_before)
+            next_due_at[user.id] = due_by_cohort[cohort]
+        batch_skipped = UserRepository.skip_stale_daily_emails(stale_before, next_due_at)
+        skipped += batch_skipped
+        
+        if len(users) < batch_size or not batch_skipped:
+            break
+    
+    if skipped:
+        print(f"[{datetime.utcnow().isoformat()}] Skipped {skipped} stale daily emails")
+    return skipped
+
+
+def _prepare_emails(
+    users: list,
+    utc_now: datetime,
+    phases: Dict[str, float]
+) -> List[Tuple[Any, Tuple[str, str, list]]]:
+    """
+    Build the daily emails for a batch of leased users.
+    
+    Practice lists for the whole batch are fetched with a few bulk
+    queries rather than several per user, and timezone work is done once
+    per timezone cohort.
+    
+    Returns:
+        List of (user, (email, date_label, practice_items)), empty if the
+        practice lists could not be built.
+    """
+    from services import PracticeService
+    from extensions import db
+    
+    with _timed(phases, 'query'):
+        try:
+            practice_items = PracticeService.get_practice_items_for_users(users, utc_now)
+        except Exception as e:
+            db.session.rollback()
+            print(f"[{datetime.utcnow().isoformat()}] Error building practice lists: {e}")
+            for user in users:
+                _schedule_retry(user, utc_now)
+            return []
+    
+    with _timed(phases, 'render'):
+        return _build_emails(users, practice_items, utc_now)
+
+
+def _build_emails(users: list, practice_items: dict, utc_now: datetime) -> List[Tuple[Any, Tuple[str, str, list]]]:
+    """Pair each user with their (email, date_label, practice_items); a timezone cohort shares one date label."""
+    from services import TimezoneService
+    
+    prepared = []
+    for user_tz, cohort in TimezoneService.group_by_zone(users).items():
+        date_label = TimezoneService.local_date(user_tz, utc_now).strftime('%A, %B %d, %Y')
+        for user in cohort:
+            prepared.append((user, (user.email, date_label, practice_items[user.id])))
+    return prepared
+
+
+def _next_due_after_send(users: list, utc_now: datetime) -> Dict[int, datetime]:
+    """Get each user's next due time once sent now, computed once per (timezone, send time)."""
+    from services import DailyEmailService
+    
+    due_by_cohort = {}
+    next_due_at = {}
     for user in users:
+        cohort = ((user.timezone or 'UTC').strip(), user.daily_email_time)
+        if cohort not in due_by_cohort:
+            due_by_cohort[cohort] = DailyEmailService.compute_due_after_send(user, utc_now)
+        next_due_at[user.id] = due_by_cohort[cohort]
+    return next_due_at
+
+
+def _dispatch_emails(app, emails: list, timeout: float) -> List[Optional[bool]]:
+    """Send a chunk of daily emails from a pool thread. Must not touch the database."""
+    from services import EmailService
+    
+    with app.app_context():
+        return EmailService.send_daily_practice_emails_batch(emails, timeout=timeout)
+
+
+def _collect_results(futures: dict) -> Tuple[int, List[int], int]:
+    """
+    Wait for all of a batch's sends to finish.
+    
+    futures maps each pending chunk to its (user_id, email) pairs, in
+    send order. Every send is bounded by DAILY_EMAIL_SEND_TIMEOUT, so this
+    never waits long. Only sends that definitely failed are returned for
+    reverting; a send whose outcome is unknown (its response timed out or
+    Brevo answered 5xx) may have been delivered, so it stays marked as
+    sent and is not retried.
+    
+    Returns:
+        Tuple of (sent count, failed user IDs, unknown outcome count)
+    """
+    sent = unknown = 0
+    failed_ids = []
+    
+    for future in as_completed(futures):
+        chunk = futures[future]
         try:
-            user_tz = PracticeService.get_user_timezone(user)
-            local_now = utc_now.replace(tzinfo=ZoneInfo('UTC')).astimezone(user_tz)
-            local_today = local_now.date()
-            
-            # Parse preferred send time
-            send_time_str = user.daily_email_time or '06:00'
+            results = future.result()
+        except Exception as e:
+            # Sends catch their own errors, so this failed before sending
+            print(f"[{datetime.utcnow().isoformat()}] Error sending to {len(chunk)} users: {e}")
+            results = [False] * len(chunk)
+        
+        for (user_id, email), success in zip(chunk, results):
+            if success:
+                print(f"[{datetime.utcnow().isoformat()}] Sent daily email to {email[0]}")
+                sent += 1
+            elif success is None:
+                unknown += 1
+                print(f"[{datetime.utcnow().isoformat()}] Unknown outcome sending email to {email[0]}, not retrying")
+            else:
+                print(f"[{datetime.utcnow().isoformat()}] Failed to send email to {email[0]}")
+                failed_ids.append(user_id)
+    
+    return sent, failed_ids, unknown
+
+
+def _schedule_retry(user, utc_now: datetime) -> None:
+    """Push a failed user's due time back so the scheduler doesn't spin on it."""
+    from flask import current_app
+    from repositories import UserRepository
+    from extensions import db
+    
+    retry_seconds = current_app.config.get('DAILY_EMAIL_RETRY_SECONDS', 60)
+    try:
+        user.next_email_due_at = utc_now + timedelta(seconds=retry_seconds)
+        UserRepository.release_daily_email_lease(user)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"[{datetime.utcnow().isoformat()}] Could not reschedule user {user.id}: {e}")
+
+
+def get_worker_id() -> str:
+    """Identify this worker process in lease columns."""
+    return f"{socket.gethostname()}:{os.getpid()}:{_WORKER_TOKEN}"
+
+
+class DailyEmailScheduler:
+    """
+    Sleeps until the next daily email is due instead of polling.
+    
+    Keeps a min-heap of upcoming (due_at, user_id) pairs read from the
+    next_email_due_at index, and also drains the transactional email
+    outbox when its next email is due. The heap only covers the next refresh window
+    and is re-read after every send and at least every refresh_seconds.
+    In between, every change_check_seconds one index seek checks whether
+    any user is now due before the head of the heap (e.g. a send time
+    moved earlier in the web app) and re-reads it if so. Later send times
+    need no check: the heap is re-read when its head comes due, and a
+    user no longer due is simply not claimed.
+    
+    Users overdue by more than overdue_seconds (e.g. after the worker was
+    down) are kept out of the heap as a backlog, drained catchup_batch
+    users at a time at catchup_per_minute, so on-time emails are never
+    stuck behind it. A catchup_per_minute of 0 sends the backlog at once.
+    """
+    
+    def __init__(
+        self,
+        refresh_seconds: int = 300,
+        overdue_seconds: int = 900,
+        catchup_per_minute: int = 0,
+        catchup_batch: int = 1000,
+        change_check_seconds: int = 15
+    ):
+        self.refresh_seconds = refresh_seconds
+        self.change_check_seconds = change_check_seconds
+        self.overdue_seconds = overdue_seconds
+        self.catchup_per_minute = catchup_per_minute
+        # At most a minute's worth of backlog per tick
+        self.catchup_batch = max(1, min(catchup_batch, catchup_per_minute or catchup_batch))
+        self._heap = []
+        self._backlog = 0
+        self._catchup_at = None
+        self._outbox_due_at = None
+        self._refresh_at = datetime.min
+        self._check_at = None
+        self._wake = threading.Event()
+    
+    def refresh(self) -> None:
+        """Reload upcoming due times from the database."""
+        from repositories import UserRepository, EmailOutboxRepository
+        
+        utc_now = datetime.utcnow()
+        horizon = utc_now + timedelta(seconds=self.refresh_seconds)
+        due_times = UserRepository.get_daily_email_due_times(horizon)
+        
+        backlog = 0
+        if self.catchup_per_minute:
+            overdue_before = utc_now - timedelta(seconds=self.overdue_seconds)
+            on_time = [
+                (due_at, user_id) for due_at, user_id in due_times
+                if due_at >= overdue_before
+            ]
+            backlog = len(due_times) - len(on_time)
+            due_times = on_time
+        
+        if backlog and not self._backlog:
+            print(
+                f"[{utc_now.isoformat()}] Catching up on {backlog} overdue daily emails "
+                f"at {self.catchup_per_minute}/min"
+            )
+        self._backlog = backlog
+        if not backlog:
+            self._catchup_at = None
+        elif self._catchup_at is None:
+            self._catchup_at = utc_now
+        
+        self._heap = due_times
+        heapq.heapify(self._heap)
+        self._outbox_due_at = EmailOutboxRepository.get_next_attempt_at()
+        self._refresh_at = horizon
+        if self.change_check_seconds:
+            self._check_at = utc_now + timedelta(seconds=self.change_check_seconds)
+    
+    def schedule_changed(self, utc_now: datetime) -> bool:
+        """Check whether any user is now due before the next known wakeup."""
+        from repositories import UserRepository
+        
+        next_due_at = UserRepository.get_next_daily_email_due_at(utc_now)
+        next_known = self._heap[0][0] if self._heap else self._refresh_at
+        return next_due_at is not None and next_due_at < next_known
+    
+    def wake(self) -> None:
+        """Interrupt the current sleep and refresh (e.g. from a signal handler)."""
+        self._refresh_at = datetime.min
+        self._wake.set()
+    
+    def seconds_until_next(self, utc_now: datetime) -> float:
+        """Seconds until the next due email or scheduled refresh."""
+        next_wakeup = self._refresh_at
+        if self._heap:
+            next_wakeup = min(next_wakeup, self._heap[0][0])
+        if self._catchup_at:
+            next_wakeup = min(next_wakeup, self._catchup_at)
+        if self._outbox_due_at:
+            next_wakeup = min(next_wakeup, self._outbox_due_at)
+        if self._check_at:
+            next_wakeup = min(next_wakeup, self._check_at)
+        return max((next_wakeup - utc_now).total_seconds(), 0)
+    
+    def run_forever(self) -> None:
+        """Send emails as they become due, sleeping in between."""
+        from services import EmailOutboxService
+        
+        while True:
+            utc_now = datetime.utcnow()
             try:
-                hh, mm = send_time_str.split(':')
-                send_hour = int(hh)
-                send_minute = int(mm)
-            except ValueError:
-                send_hour, send_minute = 6, 0
-            
-            # Check if it's time to send
-            if local_now.hour < send_hour:
-                continue
-            if local_now.hour == send_hour and local_now.minute < send_minute:
-                continue
-            
-            # Check if already sent today
-            if user.daily_email_last_sent_at:
-                last_sent_local = user.daily_email_last_sent_at.replace(
-                    tzinfo=ZoneInfo('UTC')
-                ).astimezone(user_tz)
-                if last_sent_local.date() == local_today:
+                if self._heap and self._heap[0][0] <= utc_now:
+                    send_daily_practice_emails(catchup_limit=0 if self.catchup_per_minute else None)
+                    self.refresh()
                     continue
+                if self._catchup_at and self._catchup_at <= utc_now:
+                    send_daily_practice_emails(catchup_limit=self.catchup_batch)
+                    self._catchup_at = utc_now + timedelta(
+                        seconds=self.catchup_batch * 60 / self.catchup_per_minute
+                    )
+                    self.refresh()
+                    continue
+                if self._outbox_due_at and self._outbox_due_at <= utc_now:
+                    EmailOutboxService.dispatch_pending(get_worker_id())
+                    self.refresh()
+                    continue
+                if utc_now >= self._refresh_at:
+                    self.refresh()
+                    continue
+                if self._check_at and self._check_at <= utc_now:
+                    self._check_at = utc_now + timedelta(seconds=self.change_check_seconds)
+                    if self.schedule_changed(utc_now):
+                        self.refresh()
+                        continue
+            except Exception as e:
+                print(f"[{datetime.utcnow().isoformat()}] Worker error: {e}")
+                self._heap = []
+                self._catchup_at = None
+                self._outbox_due_at = None
+                self._check_at = None
+                self._refresh_at = utc_now + timedelta(seconds=self.refresh_seconds)
             
-            # Get practice items
-            practice_items = PracticeService.get_practice_items_for_email(user, utc_now)
-            date_label = local_today.strftime('%A, %B %d, %Y')
-            
-            # Send email
-            success = EmailService.send_daily_practice_email(
-                user.email,
-                date_label,
-                practice_items
+            self._wake.wait(self.seconds_until_next(datetime.utcnow()))
+            self._wake.clear()
+
+
+def create_worker_app(config_class=None, migrate: bool = False):
+    """
+    Create a minimal Flask app for the worker.
+    
+    Unlike app.create_app, this only sets up the database and models:
+    no blueprints, CLI commands or web-only dependencies. Migrations are
+    left to the web app unless migrate is True.
+    """
+    from flask import Flask
+    from config import get_config
+    from extensions import db
+    import models  # noqa: F401  (registers the models)
+    
+    app = Flask(__name__)
+    app.config.from_object(config_class or get_config())
+    db.init_app(app)
+    
+    if migrate:
+        from migrations import migrate_database
+        with app.app_context():
+            migrate_database()
+    
+    return app
+
+
+def preview_daily_practice_emails(limit: int = 1000) -> int:
+    """
+    Print the daily emails that are due now, without sending anything.
+    
+    Read-only: users are not leased or marked sent, so this is
+    safe to run next to live workers.
+    
+    Returns:
+        Number of emails that would be sent.
+    """
+    from repositories import UserRepository
+    from services import PracticeService
+    from extensions import db
+    
+    utc_now = datetime.utcnow()
+    phases = dict.fromkeys(PHASES, 0.0)
+    try:
+        with _timed(phases, 'query'):
+            due = UserRepository.get_unleased_users_due_for_daily_email(utc_now, limit)
+            practice_items = PracticeService.get_practice_items_for_users(due, utc_now) if due else {}
+        with _timed(phases, 'render'):
+            prepared = _build_emails(due, practice_items, utc_now)
+    finally:
+        db.session.rollback()
+    
+    for user, (email, date_label, items) in prepared:
+        titles = ', '.join(item['title'] for item in items) or 'no practice items'
+        print(f"Would send to {email} ({user.timezone or 'UTC'}, {date_label}): {titles}")
+    print(
+        f"Dry run: {len(prepared)} emails due "
+        f"(query {phases['query']:.2f}s, render {phases['render']:.2f}s)"
+    )
+    return len(prepared)
+
+
+BENCHMARK_TIMEZONES = (
+    'UTC', 'America/New_York', 'America/Los_Angeles', 'America/Sao_Paulo',
+    'Europe/London', 'Europe/Berlin', 'Asia/Kolkata', 'Asia/Tokyo', 'Australia/Sydney',
+)
+
+
+def _seed_benchmark_users(user_count: int, problems_per_user: int, seed: int) -> None:
+    """Insert synthetic users, all due now, with problems spread over the practice intervals."""
+    from extensions import db
+    from models import User, Problem
+    from repositories import ProblemCountRepository
+    from services import PracticeService
+    
+    rng = random.Random(seed)
+    utc_now = datetime.utcnow()
+    due_at = utc_now - timedelta(minutes=1)
+    solved_days = list(PracticeService.PRACTICE_INTERVALS) + list(range(40, 100))
+    difficulties = ('easy', 'medium', 'hard')
+    
+    for start in range(0, user_count, 5000):
+        end = min(start + 5000, user_count)
+        db.session.execute(User.__table__.insert(), [
+            {
+                'id': i + 1,
+                'username': f'bench{i}',
+                'email': f'bench{i}@example.invalid',
+                'password_hash': 'x',
+                'timezone': rng.choice(BENCHMARK_TIMEZONES),
+                'daily_email_enabled': True,
+                'daily_email_time': '06:00',
+                'next_email_due_at': due_at,
+                'stats_version': 0,
+                'created_at': utc_now,
+            }
+            for i in range(start, end)
+        ])
+        db.session.execute(Problem.__table__.insert(), [
+            {
+                'user_id': i + 1,
+                'title': f'Problem {i}-{n}',
+                'leetcode_url': f'https://leetcode.com/problems/bench-{i}-{n}/',
+                'difficulty': rng.choice(difficulties),
+                'solved_date': utc_now - timedelta(days=rng.choice(solved_days)),
+                'created_at': utc_now,
+                'practice_count': 0,
+            }
+            for i in range(start, end)
+            for n in range(problems_per_user)
+        ])
+    db.session.commit()
+    ProblemCountRepository.rebuild()
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of this process in MB, where the platform reports it."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak / (1024 * 1024) if os.uname().sysname == 'Darwin' else peak / 1024
+
+
+def run_benchmark(
+    user_count: int = 10000,
+    transport: str = 'null',
+    latency_ms: float = 0,
+    error_rate: float = 0.0,
+    problems_per_user: int = 8,
+    trace_memory: bool = False,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Time one worker tick against synthetic users in a throwaway database.
+    
+    The 'null' transport accepts every email without I/O, measuring the
+    worker alone; 'fake' sends real HTTP requests to a local
+    FakeBrevoServer with the given latency and error rate.
+    
+    Returns:
+        The tick's summary from send_daily_practice_emails.
+    """
+    from config import get_config
+    from services import EmailService
+    from utils.fake_brevo import FakeBrevoServer
+    
+    server = None
+    overrides = {
+        'EMAIL_OUTBOX_DISPATCH_IN_APP': False,
+        'EMAIL_TRANSPORT': EmailService.TRANSPORT_NULL,
+    }
+    if transport == 'fake':
+        server = FakeBrevoServer(latency_ms=latency_ms, error_rate=error_rate, seed=seed).start()
+        overrides.update(
+            EMAIL_TRANSPORT=EmailService.TRANSPORT_BREVO,
+            BREVO_API_KEY='benchmark',
+            BREVO_API_HOST=server.host,
+        )
+    
+    with tempfile.TemporaryDirectory(prefix='daily-email-benchmark-') as tmp:
+        overrides['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp, 'benchmark.db')}"
+        config_class = type('BenchmarkConfig', (get_config(),), overrides)
+        app = create_worker_app(config_class, migrate=True)
+        
+        with app.app_context():
+            seed_started = time.monotonic()
+            _seed_benchmark_users(user_count, problems_per_user, seed)
+            print(
+                f"Seeded {user_count} users with {problems_per_user} problems each "
+                f"in {time.monotonic() - seed_started:.2f}s"
             )
             
-            if success:
-                user.daily_email_last_sent_at = utc_now
-                db.session.commit()
-                print(f"[{datetime.utcnow().isoformat()}] Sent daily email to {user.email}")
-            else:
-                print(f"[{datetime.utcnow().isoformat()}] Failed to send email to {user.email}")
-                
-        except Exception as e:
-            print(f"[{datetime.utcnow().isoformat()}] Error processing user {user.id}: {e}")
-            continue
+            if trace_memory:
+                tracemalloc.start()
+            # Per-email log lines would dominate the timings
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                result = send_daily_practice_emails('benchmark')
+            if trace_memory:
+                result['traced_peak_mb'] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+                tracemalloc.stop()
+            
+            from extensions import db
+            db.session.remove()
+            db.engine.dispose()
+    
+    if server is not None:
+        server.stop()
+    
+    elapsed = result['elapsed']
+    print(
+        f"Transport: {transport}"
+        + (f" (latency {latency_ms:g}ms, error rate {error_rate:g})" if server else "")
+    )
+    print(
+        f"Sent {result['sent']}, failed {result['failed']}, unknown {result['unknown']} in {elapsed:.2f}s "
+        f"({result['sent'] / elapsed if elapsed else 0:.1f} emails/s)"
+    )
+    for phase in PHASES:
+        seconds = result['phases'][phase]
+        share = seconds / elapsed * 100 if elapsed else 0
+        print(f"  {phase:<7} {seconds:8.3f}s  {share:5.1f}%")
+    if server is not None:
+        print(
+            f"Fake Brevo: {server.requests} requests, {server.messages} emails, "
+            f"{server.failed_requests} failed requests"
+        )
+    peak_rss = _peak_rss_mb()
+    if peak_rss is not None:
+        print(f"Peak RSS: {peak_rss:.1f} MB")
+    if trace_memory:
+        print(f"Peak traced Python memory during tick: {result['traced_peak_mb']:.1f} MB")
+    
+    return result
 
 
 def main():
     """Main worker loop."""
-    from app import app
+    parser = argparse.ArgumentParser(description='Send daily practice emails.')
+    parser.add_argument(
+        '--migrate',
+        action='store_true',
+        help='run database migrations before starting (the web app normally does this)'
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='print the emails due now without sending or writing anything, then exit'
+    )
+    parser.add_argument('--limit', type=int, default=1000, help='max users to show with --dry-run')
     
-    print("Starting daily email worker...")
+    benchmark = parser.add_argument_group('benchmark')
+    benchmark.add_argument(
+        '--benchmark',
+        action='store_true',
+        help='time one tick against synthetic users in a temporary database, then exit'
+    )
+    benchmark.add_argument('--users', type=int, default=10000, help='synthetic users to seed')
+    benchmark.add_argument('--problems-per-user', type=int, default=8)
+    benchmark.add_argument(
+        '--transport',
+        choices=('null', 'fake'),
+        default='null',
+        help="'null' skips sending; 'fake' sends to a local fake Brevo server"
+    )
+    benchmark.add_argument('--latency-ms', type=float, default=50, help='fake Brevo latency per request')
+    benchmark.add_argument('--error-rate', type=float, default=0.0, help='fake Brevo share of failed requests')
+    benchmark.add_argument('--trace-memory', action='store_true', help='also trace Python allocations (slower)')
+    args = parser.parse_args()
+    
+    if args.benchmark:
+        run_benchmark(
+            user_count=args.users,
+            transport=args.transport,
+            latency_ms=args.latency_ms,
+            error_rate=args.error_rate,
+            problems_per_user=args.problems_per_user,
+            trace_memory=args.trace_memory
+        )
+        return
+    
+    app = create_worker_app(migrate=args.migrate)
+    
+    if args.dry_run:
+        with app.app_context():
+            preview_daily_practice_emails(args.limit)
+        return
+    
+    print(f"Starting daily email worker {get_worker_id()}...")
     print("Press Ctrl+C to stop.")
     
     with app.app_context():
-        while True:
-            try:
-                send_daily_practice_emails()
-            except Exception as e:
-                print(f"[{datetime.utcnow().isoformat()}] Worker error: {e}")
-            
-            # Sleep for 1 minute
-            time.sleep(60)
+        scheduler = DailyEmailScheduler(
+            refresh_seconds=app.config.get('DAILY_EMAIL_REFRESH_SECONDS', 300),
+            overdue_seconds=app.config.get('DAILY_EMAIL_OVERDUE_SECONDS', 900),
+            catchup_per_minute=app.config.get('DAILY_EMAIL_CATCHUP_PER_MINUTE', 6000),
+            catchup_batch=app.config.get('DAILY_EMAIL_BATCH_SIZE', 1000),
+            change_check_seconds=app.config.get('DAILY_EMAIL_CHANGE_CHECK_SECONDS', 15)
+        )
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, lambda signum, frame: scheduler.wake())
+        
+        scheduler.run_forever()
 
 
 if __name__ == '__main__':
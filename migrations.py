@@ -0,0 +1,160 @@
+"""
+Database migrations.
+
+Creates missing tables, adds columns and indexes introduced after a
+database was created (dropping ones no longer used), and backfills
+derived tables. Run by the web app
+at startup and by the daily email worker only when asked to.
+"""
+from extensions import db
+
+# Indexes no query uses any more; dropped so they stop slowing down writes
+OBSOLETE_INDEXES = [
+    'ix_problems_user_practice_count',  # Practice level counts read the problem_counts rollup
+]
+
+
+def create_tables():
+    """Create database tables if they don't exist."""
+    # Import models to register them with SQLAlchemy
+    from models import User, Problem, ProblemHistory, PasswordResetToken, EmailChangeRequest, DailyGoal, DailyActivity, ProblemCount, EmailOutbox, ProblemCatalog
+    db.create_all()
+
+
+def migrate_database():
+    """Create missing tables and run migrations for schema changes."""
+    from sqlalchemy import text
+    
+    # Create tables that might be missing
+    create_tables()
+    
+    # Check and add missing columns
+    migrations = [
+        # User table migrations
+        ("users", "profile_image", "VARCHAR(255)"),
+        ("users", "timezone", "VARCHAR(64) DEFAULT 'UTC'"),
+        ("users", "daily_email_enabled", "BOOLEAN DEFAULT 0"),
+        ("users", "daily_email_time", "VARCHAR(5) DEFAULT '06:00'"),
+        ("users", "daily_email_last_sent_at", "DATETIME"),
+        ("users", "next_email_due_at", "DATETIME"),
+        ("users", "daily_email_lease_owner", "VARCHAR(64)"),
+        ("users", "daily_email_lease_expires_at", "DATETIME"),
+        ("users", "stats_version", "INTEGER NOT NULL DEFAULT 0"),
+        
+        # Problem table migrations
+        ("problems", "practice_count", "INTEGER DEFAULT 0"),
+        ("problems", "last_practiced", "DATETIME"),
+        
+        # Daily goal table migrations
+        ("daily_goals", "scheduled_ids", "TEXT"),
+        
+        # Email outbox migrations
+        ("email_outbox", "text_content", "TEXT"),
+    ]
+    
+    for table, column, column_type in migrations:
+        if not _column_exists(table, column):
+            try:
+                db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+                db.session.commit()
+                print(f"Added column {column} to {table}")
+            except Exception as e:
+                db.session.rollback()
+                print(f"Migration error ({table}.{column}): {e}")
+    
+    # Create indexes declared on models that existing databases lack
+    _create_indexes()
+    _drop_indexes(OBSOLETE_INDEXES)
+    
+    # Backfill rollup tables added after data already existed
+    _backfill_daily_activity()
+    _backfill_problem_counts()
+    
+    # Schedule users who enabled daily email before next_email_due_at existed
+    _backfill_next_email_due_at()
+
+
+def _create_indexes():
+    """Create indexes declared on models that are missing from the database."""
+    from sqlalchemy import inspect
+    
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            try:
+                index.create(db.engine)
+                print(f"Created index {index.name} on {table.name}")
+            except Exception as e:
+                print(f"Migration error ({index.name}): {e}")
+
+
+def _drop_indexes(names):
+    """Drop the named indexes if an existing database still has them."""
+    from sqlalchemy import text
+    
+    for name in names:
+        if db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name"), {'name': name}
+        ).first() is None:
+            continue
+        try:
+            db.session.execute(text(f"DROP INDEX {name}"))
+            db.session.commit()
+            print(f"Dropped index {name}")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Migration error ({name}): {e}")
+
+
+def _backfill_daily_activity():
+    """Build the daily activity rollup if it is empty but history exists."""
+    from models import ProblemHistory
+    from repositories import DailyActivityRepository
+    
+    if DailyActivityRepository.is_empty() and ProblemHistory.query.first() is not None:
+        rows = DailyActivityRepository.rebuild()
+        print(f"Backfilled daily_activity ({rows} rows)")
+
+
+def _backfill_problem_counts():
+    """Build the problem counts rollup if it is empty but problems exist."""
+    from models import Problem
+    from repositories import ProblemCountRepository
+    
+    if ProblemCountRepository.is_empty() and Problem.query.first() is not None:
+        rows = ProblemCountRepository.rebuild()
+        print(f"Backfilled problem_counts ({rows} rows)")
+
+
+def _backfill_next_email_due_at():
+    """Set next_email_due_at for enabled users that have none, so due lookups are a pure index range."""
+    from datetime import datetime
+    from models import User
+    from services import DailyEmailService
+    
+    users = User.query.filter(
+        User.daily_email_enabled == True,  # noqa: E712
+        User.next_email_due_at.is_(None)
+    ).all()
+    if not users:
+        return
+    
+    utc_now = datetime.utcnow()
+    for user in users:
+        DailyEmailService.reschedule(user, utc_now)
+    db.session.commit()
+    print(f"Backfilled next_email_due_at ({len(users)} users)")
+
+
+def _column_exists(table: str, column: str) -> bool:
+    """Check if a column exists in a table."""
+    from sqlalchemy import text
+    try:
+        result = db.session.execute(text(f"PRAGMA table_info({table})"))
+        columns = [row[1] for row in result.fetchall()]
+        return column in columns
+    except Exception:
+        return False
@@ -8,6 +8,10 @@ from models.user import User
 from models.problem import Problem, ProblemHistory
 from models.auth import PasswordResetToken, EmailChangeRequest
 from models.daily_goal import DailyGoal
+from models.daily_activity import DailyActivity
+from models.problem_count import ProblemCount
+from models.email_outbox import EmailOutbox
+from models.problem_catalog import ProblemCatalog
 
 __all__ = [
     'User',
@@ -16,4 +20,8 @@ __all__ = [
     'PasswordResetToken',
     'EmailChangeRequest',
     'DailyGoal',
+    'DailyActivity',
+    'ProblemCount',
+    'EmailOutbox',
+    'ProblemCatalog',
 ]
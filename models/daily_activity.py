@@ -0,0 +1,28 @@
+"""
+DailyActivity model - per-day rollup of solves and practice sessions.
+"""
+from extensions import db
+
+
+class DailyActivity(db.Model):
+    """Daily activity counts per user, maintained by problem writes."""
+    
+    __tablename__ = 'daily_activity'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    
+    # The UTC date these counts are for
+    day = db.Column(db.Date, nullable=False)
+    
+    # Counts
+    solves = db.Column(db.Integer, nullable=False, default=0)  # Problems whose solved_date is this day
+    practices = db.Column(db.Integer, nullable=False, default=0)  # History entries on this day
+    
+    # Unique constraint: one record per user per day
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'day', name='unique_user_daily_activity'),
+    )
+    
+    def __repr__(self) -> str:
+        return f'<DailyActivity user={self.user_id} day={self.day} {self.solves}/{self.practices}>'
@@ -1,7 +1,8 @@
 """
 DailyGoal model - tracks daily practice goal achievement.
 """
-from datetime import datetime, date
+from typing import Set
+from datetime import datetime
 from extensions import db
 
 
@@ -20,6 +21,7 @@ class DailyGoal(db.Model):
     total_scheduled = db.Column(db.Integer, default=0)  # Problems scheduled for this day
     completed = db.Column(db.Integer, default=0)  # Problems completed
     achieved = db.Column(db.Boolean, default=False)  # Was goal met?
+    scheduled_ids = db.Column(db.Text, nullable=True)  # Comma-separated problem IDs scheduled this day
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -30,5 +32,11 @@ class DailyGoal(db.Model):
         db.UniqueConstraint('user_id', 'goal_date', name='unique_user_daily_goal'),
     )
     
+    def get_scheduled_ids(self) -> Set[int]:
+        """Get the set of problem IDs scheduled for this day."""
+        if not self.scheduled_ids:
+            return set()
+        return {int(problem_id) for problem_id in self.scheduled_ids.split(',')}
+    
     def __repr__(self) -> str:
         return f'<DailyGoal user={self.user_id} date={self.goal_date} {self.completed}/{self.total_scheduled}>'
@@ -0,0 +1,41 @@
+"""
+EmailOutbox model - transactional emails waiting to be sent.
+"""
+from datetime import datetime
+from extensions import db
+
+
+class EmailOutbox(db.Model):
+    """Outgoing email, written with the change it notifies about and sent later."""
+    
+    __tablename__ = 'email_outbox'
+    
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # Message
+    to_email = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    html_content = db.Column(db.Text, nullable=False)
+    text_content = db.Column(db.Text, nullable=True)  # Plain-text alternative
+    idempotency_key = db.Column(db.String(64), unique=True, nullable=False)  # Sent to Brevo to drop duplicates
+    
+    # Delivery state
+    status = db.Column(db.String(16), nullable=False, default=STATUS_PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # UTC; pushed out while leased
+    lease_owner = db.Column(db.String(64), nullable=True)  # Dispatcher currently sending
+    last_error = db.Column(db.Text, nullable=True)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+    
+    def __repr__(self) -> str:
+        return f'<EmailOutbox {self.id} {self.to_email} {self.status}>'
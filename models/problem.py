@@ -35,6 +35,14 @@ class Problem(db.Model):
         order_by='ProblemHistory.practiced_at.desc()'
     )
     
+    # Indexes: every query is scoped to a user
+    __table_args__ = (
+        db.Index('ix_problems_user_id', 'user_id'),  # Walks a user's problems in id order
+        db.Index('ix_problems_user_solved_date', 'user_id', 'solved_date'),
+        db.Index('ix_problems_user_last_practiced', 'user_id', 'last_practiced'),
+        db.Index('ix_problems_user_url', 'user_id', 'leetcode_url'),
+    )
+    
     def __repr__(self) -> str:
         return f'<Problem {self.title}>'
 
@@ -48,5 +56,10 @@ class ProblemHistory(db.Model):
     problem_id = db.Column(db.Integer, db.ForeignKey('problems.id'), nullable=False)
     practiced_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     
+    # Indexes: history is loaded per problem, newest first, or by date range
+    __table_args__ = (
+        db.Index('ix_problem_history_problem_practiced_at', 'problem_id', 'practiced_at'),
+    )
+    
     def __repr__(self) -> str:
         return f'<ProblemHistory {self.problem_id} at {self.practiced_at}>'
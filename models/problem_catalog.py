@@ -0,0 +1,19 @@
+"""
+ProblemCatalog model - Leetcode problem metadata shared by all users.
+"""
+from datetime import datetime
+from extensions import db
+
+
+class ProblemCatalog(db.Model):
+    """Scraped title and difficulty of a Leetcode problem, keyed by URL slug."""
+    
+    __tablename__ = 'problem_catalog'
+    
+    slug = db.Column(db.String(255), primary_key=True)  # e.g. 'two-sum'
+    title = db.Column(db.String(255), nullable=False)
+    difficulty = db.Column(db.String(10), nullable=False)  # easy, medium, hard
+    fetched_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # UTC; refreshed after PROBLEM_CATALOG_TTL_SECONDS
+    
+    def __repr__(self) -> str:
+        return f'<ProblemCatalog {self.slug}>'
@@ -0,0 +1,33 @@
+"""
+ProblemCount model - per-user problem counts by difficulty and practice level.
+"""
+from extensions import db
+
+
+class ProblemCount(db.Model):
+    """Number of a user's problems per (difficulty, practice level), maintained by problem writes."""
+    
+    __tablename__ = 'problem_counts'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    
+    difficulty = db.Column(db.String(10), nullable=False)
+    practice_level = db.Column(db.Integer, nullable=False)  # practice_count, capped at MAX_LEVEL
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # practice_count values at or above this share one row
+    MAX_LEVEL = 3
+    
+    # Unique constraint: one record per user, difficulty and level
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'difficulty', 'practice_level', name='unique_user_problem_count'),
+    )
+    
+    @staticmethod
+    def level(practice_count) -> int:
+        """Get the practice level a practice_count is counted under."""
+        return min(practice_count or 0, ProblemCount.MAX_LEVEL)
+    
+    def __repr__(self) -> str:
+        return f'<ProblemCount user={self.user_id} {self.difficulty}/{self.practice_level}={self.count}>'
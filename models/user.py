@@ -26,6 +26,12 @@ class User(db.Model):
     daily_email_enabled = db.Column(db.Boolean, default=False)
     daily_email_time = db.Column(db.String(5), nullable=True, default='06:00')
     daily_email_last_sent_at = db.Column(db.DateTime, nullable=True)
+    next_email_due_at = db.Column(db.DateTime, nullable=True)  # UTC; None when disabled
+    daily_email_lease_owner = db.Column(db.String(64), nullable=True)  # Worker currently sending
+    daily_email_lease_expires_at = db.Column(db.DateTime, nullable=True)
+    
+    # Bumped on every problem write; part of the stats cache key
+    stats_version = db.Column(db.Integer, nullable=False, default=0)
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -44,6 +50,13 @@ class User(db.Model):
         cascade='all, delete-orphan'
     )
     
+    # Indexes: the email worker looks up users whose daily email is due,
+    # then the batch it just leased
+    __table_args__ = (
+        db.Index('ix_users_daily_email_due', 'daily_email_enabled', 'next_email_due_at'),
+        db.Index('ix_users_daily_email_lease', 'daily_email_lease_owner', 'daily_email_lease_expires_at'),
+    )
+    
     def set_password(self, password: str) -> None:
         """Hash and set the user's password."""
         self.password_hash = generate_password_hash(password)
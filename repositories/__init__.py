@@ -8,10 +8,18 @@ from repositories.user_repository import UserRepository
 from repositories.problem_repository import ProblemRepository
 from repositories.auth_repository import AuthRepository
 from repositories.daily_goal_repository import DailyGoalRepository
+from repositories.daily_activity_repository import DailyActivityRepository
+from repositories.problem_count_repository import ProblemCountRepository
+from repositories.email_outbox_repository import EmailOutboxRepository
+from repositories.problem_catalog_repository import ProblemCatalogRepository
 
 __all__ = [
     'UserRepository',
     'ProblemRepository',
     'AuthRepository',
     'DailyGoalRepository',
+    'DailyActivityRepository',
+    'ProblemCountRepository',
+    'EmailOutboxRepository',
+    'ProblemCatalogRepository',
 ]
@@ -20,7 +20,7 @@ class AuthRepository:
     
     @staticmethod
     def create_reset_token(user: User, expires_hours: int = 1) -> PasswordResetToken:
-        """Create a new password reset token for a user."""
+        """Create a new password reset token for a user (caller commits)."""
         # Delete any existing tokens
         PasswordResetToken.query.filter_by(user_id=user.id).delete()
         
@@ -33,7 +33,7 @@ class AuthRepository:
             expires_at=expires_at
         )
         db.session.add(reset_token)
-        db.session.commit()
+        db.session.flush()
         
         return reset_token
     
@@ -57,7 +57,7 @@ class AuthRepository:
         new_email: str,
         expires_minutes: int = 10
     ) -> EmailChangeRequest:
-        """Create a new email change request."""
+        """Create a new email change request (caller commits)."""
         # Delete any existing requests
         EmailChangeRequest.query.filter_by(user_id=user.id).delete()
         
@@ -74,7 +74,7 @@ class AuthRepository:
             expires_at=expires_at
         )
         db.session.add(request)
-        db.session.commit()
+        db.session.flush()
         
         return request
     
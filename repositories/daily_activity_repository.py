@@ -0,0 +1,106 @@
+"""
+DailyActivity repository - Database operations for the daily activity rollup.
+"""
+from typing import Optional, List
+from datetime import date
+from sqlalchemy.dialects.sqlite import insert
+from extensions import db
+from models import DailyActivity, Problem, ProblemHistory
+
+
+class DailyActivityRepository:
+    """Repository for DailyActivity database operations."""
+    
+    @staticmethod
+    def record(user_id: int, day: date, solves: int = 0, practices: int = 0) -> None:
+        """
+        Add to a day's counts (upsert).
+        
+        Does not commit; callers record activity in the same transaction
+        as the write it describes.
+        """
+        if not solves and not practices:
+            return
+        
+        stmt = insert(DailyActivity).values(
+            user_id=user_id,
+            day=day,
+            solves=solves,
+            practices=practices
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'day'],
+            set_={
+                'solves': DailyActivity.solves + stmt.excluded.solves,
+                'practices': DailyActivity.practices + stmt.excluded.practices,
+            }
+        )
+        db.session.execute(stmt)
+    
+    @staticmethod
+    def get_for_date_range(
+        user_id: int,
+        start_date: date,
+        end_date: date
+    ) -> List[DailyActivity]:
+        """Get active days in a date range (inclusive), ordered by day."""
+        return DailyActivity.query.filter(
+            DailyActivity.user_id == user_id,
+            DailyActivity.day >= start_date,
+            DailyActivity.day <= end_date,
+            DailyActivity.solves + DailyActivity.practices > 0
+        ).order_by(DailyActivity.day).all()
+    
+    @staticmethod
+    def is_empty() -> bool:
+        """Check if the rollup has no rows at all."""
+        return DailyActivity.query.first() is None
+    
+    @staticmethod
+    def rebuild(user_id: Optional[int] = None) -> int:
+        """
+        Recompute the rollup from problems and problem_history.
+        
+        Args:
+            user_id: Only rebuild this user's rows (defaults to all users)
+        
+        Returns:
+            Number of rollup rows written.
+        """
+        solve_day = db.func.date(Problem.solved_date)
+        solves_query = db.session.query(
+            Problem.user_id, solve_day, db.func.count(Problem.id)
+        ).group_by(Problem.user_id, solve_day)
+        
+        practice_day = db.func.date(ProblemHistory.practiced_at)
+        practices_query = db.session.query(
+            Problem.user_id, practice_day, db.func.count(ProblemHistory.id)
+        ).join(Problem, Problem.id == ProblemHistory.problem_id) \
+            .group_by(Problem.user_id, practice_day)
+        
+        delete_query = DailyActivity.query
+        if user_id is not None:
+            solves_query = solves_query.filter(Problem.user_id == user_id)
+            practices_query = practices_query.filter(Problem.user_id == user_id)
+            delete_query = delete_query.filter(DailyActivity.user_id == user_id)
+        
+        rows = {}
+        for uid, day, count in solves_query.all():
+            rows.setdefault((uid, day), {'solves': 0, 'practices': 0})['solves'] = count
+        for uid, day, count in practices_query.all():
+            rows.setdefault((uid, day), {'solves': 0, 'practices': 0})['practices'] = count
+        
+        delete_query.delete(synchronize_session=False)
+        if rows:
+            db.session.execute(DailyActivity.__table__.insert(), [
+                {
+                    'user_id': uid,
+                    'day': date.fromisoformat(day),
+                    'solves': counts['solves'],
+                    'practices': counts['practices']
+                }
+                for (uid, day), counts in rows.items()
+            ])
+        db.session.commit()
+        
+        return len(rows)
@@ -1,8 +1,9 @@
 """
 DailyGoal repository - Database operations for daily goals.
 """
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Set
 from datetime import date, datetime
+from sqlalchemy.dialects.sqlite import insert
 from extensions import db
 from models import DailyGoal
 
@@ -44,52 +45,56 @@ class DailyGoalRepository:
         return {g.goal_date.day: g for g in goals}
     
     @staticmethod
-    def create_or_update(
+    def create_with_schedule(
         user_id: int,
         goal_date: date,
-        total_scheduled: int,
+        scheduled_ids: Set[int],
         completed: int
     ) -> DailyGoal:
-        """Create or update a daily goal record."""
-        goal = DailyGoalRepository.get_for_date(user_id, goal_date)
+        """
+        Record the day's scheduled problems, unless already recorded.
         
-        if goal:
-            goal.total_scheduled = total_scheduled
-            goal.completed = completed
-            goal.achieved = completed >= total_scheduled and total_scheduled > 0
-            goal.updated_at = datetime.utcnow()
-        else:
-            goal = DailyGoal(
-                user_id=user_id,
-                goal_date=goal_date,
-                total_scheduled=total_scheduled,
-                completed=completed,
-                achieved=completed >= total_scheduled and total_scheduled > 0
-            )
-            db.session.add(goal)
+        Safe against concurrent first clicks: the insert is a no-op when a
+        row with a schedule exists, and fills in the schedule of rows
+        written before schedules were stored.
+        """
+        total_scheduled = len(scheduled_ids)
+        values = {
+            'total_scheduled': total_scheduled,
+            'completed': completed,
+            'achieved': completed >= total_scheduled and total_scheduled > 0,
+            'scheduled_ids': ','.join(str(problem_id) for problem_id in sorted(scheduled_ids)),
+        }
         
+        stmt = insert(DailyGoal).values(
+            user_id=user_id,
+            goal_date=goal_date,
+            created_at=datetime.utcnow(),
+            updated_at=datetime.utcnow(),
+            **values
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'goal_date'],
+            set_=dict(values, updated_at=datetime.utcnow()),
+            where=DailyGoal.scheduled_ids.is_(None)
+        )
+        db.session.execute(stmt)
         db.session.commit()
-        return goal
+        
+        return DailyGoalRepository.get_for_date(user_id, goal_date)
     
     @staticmethod
-    def increment_completed(user_id: int, goal_date: date, total_scheduled: int) -> DailyGoal:
-        """Increment the completed count for a daily goal."""
-        goal = DailyGoalRepository.get_for_date(user_id, goal_date)
-        
-        if goal:
-            goal.completed += 1
-            goal.total_scheduled = total_scheduled  # Update in case it changed
-            goal.achieved = goal.completed >= goal.total_scheduled and goal.total_scheduled > 0
-            goal.updated_at = datetime.utcnow()
-        else:
-            goal = DailyGoal(
-                user_id=user_id,
-                goal_date=goal_date,
-                total_scheduled=total_scheduled,
-                completed=1,
-                achieved=1 >= total_scheduled and total_scheduled > 0
-            )
-            db.session.add(goal)
-        
+    def increment_completed(user_id: int, goal_date: date) -> None:
+        """Atomically increment the completed count for a daily goal."""
+        DailyGoal.query.filter_by(user_id=user_id, goal_date=goal_date).update(
+            {
+                DailyGoal.completed: DailyGoal.completed + 1,
+                DailyGoal.achieved: db.and_(
+                    DailyGoal.completed + 1 >= DailyGoal.total_scheduled,
+                    DailyGoal.total_scheduled > 0
+                ),
+                DailyGoal.updated_at: datetime.utcnow(),
+            },
+            synchronize_session=False
+        )
         db.session.commit()
-        return goal
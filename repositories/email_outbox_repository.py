@@ -0,0 +1,123 @@
+"""
+EmailOutbox repository - Database operations for the transactional email outbox.
+"""
+from typing import Optional, List
+from datetime import datetime, timedelta
+import uuid
+from extensions import db
+from models import EmailOutbox
+
+
+class EmailOutboxRepository:
+    """Repository for EmailOutbox database operations."""
+    
+    @staticmethod
+    def enqueue(
+        to_email: str,
+        subject: str,
+        html_content: str,
+        text_content: Optional[str] = None
+    ) -> EmailOutbox:
+        """
+        Add an email to the outbox.
+        
+        Does not commit; callers enqueue in the same transaction as the
+        token or request the email is about.
+        """
+        message = EmailOutbox(
+            to_email=to_email,
+            subject=subject,
+            html_content=html_content,
+            text_content=text_content,
+            idempotency_key=uuid.uuid4().hex
+        )
+        db.session.add(message)
+        return message
+    
+    @staticmethod
+    def claim_due(owner: str, lease_seconds: int, limit: int) -> List[EmailOutbox]:
+        """
+        Lease pending emails that are due to one dispatcher.
+        
+        Claiming pushes next_attempt_at out by the lease, so a dispatcher
+        that dies mid-send leaves its emails to be retried once the lease
+        runs out.
+        """
+        now = datetime.utcnow()
+        due_ids = db.select(EmailOutbox.id).where(
+            EmailOutbox.status == EmailOutbox.STATUS_PENDING,
+            EmailOutbox.next_attempt_at <= now
+        ).order_by(EmailOutbox.next_attempt_at).limit(limit)
+        
+        lease_until = now + timedelta(seconds=lease_seconds)
+        EmailOutbox.query.filter(
+            EmailOutbox.id.in_(due_ids),
+            EmailOutbox.status == EmailOutbox.STATUS_PENDING,
+            EmailOutbox.next_attempt_at <= now
+        ).update(
+            {
+                EmailOutbox.lease_owner: owner,
+                EmailOutbox.next_attempt_at: lease_until,
+            },
+            synchronize_session=False
+        )
+        db.session.commit()
+        
+        # status leads the index, so this is a seek rather than a table scan
+        return EmailOutbox.query.filter(
+            EmailOutbox.status == EmailOutbox.STATUS_PENDING,
+            EmailOutbox.next_attempt_at == lease_until,
+            EmailOutbox.lease_owner == owner
+        ).order_by(EmailOutbox.id).all()
+    
+    @staticmethod
+    def mark_sent(message: EmailOutbox) -> None:
+        """Record a successful send."""
+        message.status = EmailOutbox.STATUS_SENT
+        message.attempts += 1
+        message.sent_at = datetime.utcnow()
+        message.lease_owner = None
+        message.last_error = None
+        db.session.commit()
+    
+    @staticmethod
+    def mark_attempt_failed(
+        message: EmailOutbox,
+        error: str,
+        retry_at: Optional[datetime]
+    ) -> None:
+        """Record a failed send, retrying at retry_at or giving up if None."""
+        message.attempts += 1
+        message.last_error = error
+        message.lease_owner = None
+        if retry_at is None:
+            message.status = EmailOutbox.STATUS_FAILED
+        else:
+            message.next_attempt_at = retry_at
+        db.session.commit()
+    
+    @staticmethod
+    def get_next_attempt_at() -> Optional[datetime]:
+        """Get when the next pending email is due, if any."""
+        return db.session.query(db.func.min(EmailOutbox.next_attempt_at)).filter(
+            EmailOutbox.status == EmailOutbox.STATUS_PENDING
+        ).scalar()
+    
+    @staticmethod
+    def delete_sent_before(cutoff: datetime) -> int:
+        """
+        Delete emails sent before a UTC time, in one DELETE.
+        
+        A sent email keeps next_attempt_at at the end of the lease it was
+        sent under, just after sent_at, so the (status, next_attempt_at)
+        index serves this.
+        
+        Returns:
+            Number of emails deleted.
+        """
+        deleted = EmailOutbox.query.filter(
+            EmailOutbox.status == EmailOutbox.STATUS_SENT,
+            EmailOutbox.next_attempt_at < cutoff
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
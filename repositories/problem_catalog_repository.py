@@ -0,0 +1,41 @@
+"""
+ProblemCatalog repository - Database operations for the shared problem catalog.
+"""
+from typing import Optional
+from datetime import datetime
+from sqlalchemy.dialects.sqlite import insert
+from extensions import db
+from models import ProblemCatalog
+
+
+class ProblemCatalogRepository:
+    """Repository for ProblemCatalog database operations."""
+    
+    @staticmethod
+    def get(slug: str) -> Optional[ProblemCatalog]:
+        """Get a problem's catalog entry by slug."""
+        return db.session.get(ProblemCatalog, slug)
+    
+    @staticmethod
+    def upsert(slug: str, title: str, difficulty: str, fetched_at: Optional[datetime] = None) -> None:
+        """
+        Record freshly scraped metadata for a problem.
+        
+        Does not commit; callers save the entry with the problem it was
+        scraped for.
+        """
+        stmt = insert(ProblemCatalog).values(
+            slug=slug,
+            title=title,
+            difficulty=difficulty,
+            fetched_at=fetched_at or datetime.utcnow()
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['slug'],
+            set_={
+                'title': stmt.excluded.title,
+                'difficulty': stmt.excluded.difficulty,
+                'fetched_at': stmt.excluded.fetched_at,
+            }
+        )
+        db.session.execute(stmt)
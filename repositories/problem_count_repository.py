@@ -0,0 +1,98 @@
+"""
+ProblemCount repository - Database operations for the problem counts rollup.
+"""
+from typing import Optional, List, Dict, Tuple
+from sqlalchemy.dialects.sqlite import insert
+from extensions import db
+from models import ProblemCount, Problem
+
+
+class ProblemCountRepository:
+    """Repository for ProblemCount database operations."""
+    
+    @staticmethod
+    def record(user_id: int, difficulty: str, practice_count: int, count: int) -> None:
+        """
+        Add to the count of a user's problems with this difficulty and practice_count (upsert).
+        
+        Does not commit; callers record counts in the same transaction as
+        the write they describe.
+        """
+        if not count:
+            return
+        
+        stmt = insert(ProblemCount).values(
+            user_id=user_id,
+            difficulty=difficulty,
+            practice_level=ProblemCount.level(practice_count),
+            count=count
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'difficulty', 'practice_level'],
+            set_={'count': ProblemCount.count + stmt.excluded.count}
+        )
+        db.session.execute(stmt)
+    
+    @staticmethod
+    def move(user_id: int, difficulty: str, old_practice_count: int, new_practice_count: int) -> None:
+        """Move one problem to the level of its new practice_count (does not commit)."""
+        if ProblemCount.level(old_practice_count) == ProblemCount.level(new_practice_count):
+            return
+        ProblemCountRepository.record(user_id, difficulty, old_practice_count, -1)
+        ProblemCountRepository.record(user_id, difficulty, new_practice_count, 1)
+    
+    @staticmethod
+    def get_for_user(user_id: int) -> List[Tuple[str, int, int]]:
+        """Get a user's (difficulty, practice_level, count) rows."""
+        return db.session.query(
+            ProblemCount.difficulty, ProblemCount.practice_level, ProblemCount.count
+        ).filter(ProblemCount.user_id == user_id).all()
+    
+    @staticmethod
+    def get_totals(user_ids: List[int]) -> Dict[int, int]:
+        """Get each user's total number of problems."""
+        return dict(db.session.query(
+            ProblemCount.user_id, db.func.sum(ProblemCount.count)
+        ).filter(ProblemCount.user_id.in_(user_ids)).group_by(ProblemCount.user_id).all())
+    
+    @staticmethod
+    def is_empty() -> bool:
+        """Check if the rollup has no rows at all."""
+        return ProblemCount.query.first() is None
+    
+    @staticmethod
+    def rebuild(user_id: Optional[int] = None) -> int:
+        """
+        Recompute the rollup from problems.
+        
+        Args:
+            user_id: Only rebuild this user's rows (defaults to all users)
+        
+        Returns:
+            Number of rollup rows written.
+        """
+        level = db.func.min(db.func.coalesce(Problem.practice_count, 0), ProblemCount.MAX_LEVEL)
+        counts_query = db.session.query(
+            Problem.user_id, Problem.difficulty, level, db.func.count(Problem.id)
+        ).group_by(Problem.user_id, Problem.difficulty, level)
+        
+        delete_query = ProblemCount.query
+        if user_id is not None:
+            counts_query = counts_query.filter(Problem.user_id == user_id)
+            delete_query = delete_query.filter(ProblemCount.user_id == user_id)
+        
+        rows = counts_query.all()
+        delete_query.delete(synchronize_session=False)
+        if rows:
+            db.session.execute(ProblemCount.__table__.insert(), [
+                {
+                    'user_id': uid,
+                    'difficulty': difficulty,
+                    'practice_level': practice_level,
+                    'count': count
+                }
+                for uid, difficulty, practice_level, count in rows
+            ])
+        db.session.commit()
+        
+        return len(rows)
@@ -1,10 +1,13 @@
 """
 Problem repository - Database operations for problems.
 """
-from typing import Optional, List
+from typing import Optional, List, Tuple, Dict
 from datetime import datetime
+from bisect import bisect_left
 from extensions import db
 from models import Problem, ProblemHistory
+from repositories.daily_activity_repository import DailyActivityRepository
+from repositories.problem_count_repository import ProblemCountRepository
 
 
 class ProblemRepository:
@@ -26,33 +29,272 @@ class ProblemRepository:
         return Problem.query.filter_by(user_id=user_id).all()
     
     @staticmethod
-    def get_problems_by_solved_date(user_id: int, target_date) -> List[Problem]:
-        """Get problems solved on a specific date."""
-        return Problem.query.filter(
+    def get_problems_in_windows(
+        user_id: int,
+        windows: List[Tuple[int, datetime, datetime]]
+    ) -> List[Tuple[Problem, int]]:
+        """
+        Get problems solved within any of several UTC ranges in one query.
+        
+        Args:
+            user_id: User ID
+            windows: List of (label, start_utc, end_utc) tuples, end exclusive
+        
+        Returns:
+            List of (problem, label) tuples, ordered by window.
+        """
+        if not windows:
+            return []
+        
+        conditions = [
+            (db.and_(Problem.solved_date >= start, Problem.solved_date < end), label)
+            for label, start, end in windows
+        ]
+        bucket = db.case(*conditions)
+        
+        rows = db.session.query(Problem, bucket).filter(
             Problem.user_id == user_id,
-            db.func.date(Problem.solved_date) == target_date
+            # Outer bounds keep this a single range scan
+            Problem.solved_date >= min(start for _, start, _ in windows),
+            Problem.solved_date < max(end for _, _, end in windows),
+            db.or_(*(condition for condition, _ in conditions))
         ).all()
+        
+        order = {label: i for i, (label, _, _) in enumerate(windows)}
+        return sorted(rows, key=lambda row: order[row[1]])
+    
+    @staticmethod
+    def count_problems(user_id: int) -> int:
+        """Count a user's problems (from the problem counts rollup)."""
+        return ProblemCountRepository.get_totals([user_id]).get(user_id, 0)
     
     @staticmethod
-    def get_problems_in_date_range(
+    def get_problems_at_offsets(
         user_id: int,
-        start_utc: datetime,
-        end_utc: datetime
+        exclude_ids: set,
+        offsets: List[int]
     ) -> List[Problem]:
-        """Get problems solved within a UTC date range."""
-        return Problem.query.filter(
-            Problem.user_id == user_id,
-            Problem.solved_date >= start_utc,
-            Problem.solved_date < end_utc
+        """
+        Get a user's problems at given positions in id order, skipping exclude_ids.
+        
+        exclude_ids must be IDs of the user's own problems. The problem at
+        a position lies at most len(exclude_ids) places past that position
+        in the bare (user_id) index, so each is found with one short walk
+        that doesn't filter every row, and only the selected rows are loaded.
+        """
+        excluded = sorted(exclude_ids)
+        problem_ids = []
+        for offset in offsets:
+            window = db.session.query(Problem.id).filter(
+                Problem.user_id == user_id
+            ).order_by(Problem.id).offset(offset).limit(len(excluded) + 1).all()
+            
+            for position, (problem_id,) in enumerate(window, start=offset):
+                # Every excluded problem before this one sits at a lower position
+                if problem_id not in exclude_ids and position - bisect_left(excluded, problem_id) == offset:
+                    problem_ids.append(problem_id)
+                    break
+        
+        if not problem_ids:
+            return []
+        
+        problems = {p.id: p for p in Problem.query.filter(Problem.id.in_(problem_ids)).all()}
+        return [problems[problem_id] for problem_id in problem_ids if problem_id in problems]
+    
+    @staticmethod
+    def get_email_items_in_windows(
+        user_ids: List[int],
+        windows: List[Tuple[int, datetime, datetime]]
+    ) -> List[Tuple[int, int, int, str, str, str]]:
+        """
+        Get problems solved within shared UTC ranges, for many users at once.
+        
+        Bulk counterpart of get_problems_in_windows for a timezone cohort,
+        whose users share their windows. The statement has the same shape
+        for any number of users, so SQLAlchemy compiles it once and reuses
+        it. Only the columns emails need are loaded.
+        
+        Args:
+            user_ids: User IDs
+            windows: List of (label, start_utc, end_utc) tuples, end exclusive
+        
+        Returns:
+            List of (user_id, label, problem_id, title, leetcode_url,
+            difficulty) tuples.
+        """
+        if not user_ids or not windows:
+            return []
+        
+        conditions = [
+            (db.and_(Problem.solved_date >= start, Problem.solved_date < end), label)
+            for label, start, end in windows
+        ]
+        
+        return db.session.query(
+            Problem.user_id,
+            db.case(*conditions),
+            Problem.id,
+            Problem.title,
+            Problem.leetcode_url,
+            Problem.difficulty
+        ).filter(
+            Problem.user_id.in_(user_ids),
+            # Outer bounds keep this a range scan per user
+            Problem.solved_date >= min(start for _, start, _ in windows),
+            Problem.solved_date < max(end for _, _, end in windows),
+            db.or_(*(condition for condition, _ in conditions))
         ).all()
     
     @staticmethod
-    def get_problems_excluding_ids(user_id: int, exclude_ids: set) -> List[Problem]:
-        """Get all problems for user except those in exclude_ids."""
-        query = Problem.query.filter(Problem.user_id == user_id)
+    def count_problems_by_user(user_ids: List[int]) -> Dict[int, int]:
+        """Count each user's problems (from the problem counts rollup)."""
+        return ProblemCountRepository.get_totals(user_ids)
+    
+    @staticmethod
+    def get_email_items_at_offsets(
+        picks: List[Tuple[int, int]],
+        exclude_ids: set
+    ) -> List[Tuple[int, int, int, str, str, str]]:
+        """
+        Get problems at given positions in each user's id order, skipping exclude_ids.
+        
+        Bulk counterpart of get_problems_at_offsets: positions are numbered
+        with ROW_NUMBER() over each user's remaining problems, so the same
+        offsets select the same problems. Picks are matched with a tuple
+        IN, keeping the statement's shape fixed so it is compiled once.
+        
+        Args:
+            picks: List of (user_id, offset) tuples
+            exclude_ids: Problem IDs to leave out (any user's)
+        
+        Returns:
+            List of (user_id, offset, problem_id, title, leetcode_url,
+            difficulty) tuples.
+        """
+        if not picks:
+            return []
+        
+        user_ids = {user_id for user_id, _ in picks}
+        position = (db.func.row_number().over(
+            partition_by=Problem.user_id,
+            order_by=Problem.id
+        ) - 1).label('position')
+        
+        numbered = db.session.query(Problem.user_id, Problem.id, position).filter(
+            Problem.user_id.in_(user_ids)
+        )
         if exclude_ids:
-            query = query.filter(~Problem.id.in_(exclude_ids))
-        return query.all()
+            numbered = numbered.filter(~Problem.id.in_(exclude_ids))
+        numbered = numbered.subquery()
+        
+        return db.session.query(
+            numbered.c.user_id,
+            numbered.c.position,
+            Problem.id,
+            Problem.title,
+            Problem.leetcode_url,
+            Problem.difficulty
+        ).join(Problem, Problem.id == numbered.c.id).filter(
+            db.tuple_(numbered.c.user_id, numbered.c.position).in_(picks)
+        ).all()
+    
+    @staticmethod
+    def get_practice_level_counts(user_id: int) -> Dict[str, int]:
+        """Count a user's problems bucketed by practice_count (from the problem counts rollup)."""
+        levels = [0] * 4
+        for _, practice_level, count in ProblemCountRepository.get_for_user(user_id):
+            levels[practice_level] += count
+        
+        never, once, partially, fully = levels
+        total = sum(levels)
+        return {
+            'fully_practiced': fully,
+            'partially_practiced': partially,
+            'solved_once': once,
+            'not_practiced': never,
+            'total': total
+        }
+    
+    @staticmethod
+    def count_practiced_by_day(
+        user_id: int,
+        yesterday_start: datetime,
+        today_start: datetime,
+        today_end: datetime
+    ) -> Tuple[int, int]:
+        """
+        Count distinct problems practiced today and yesterday.
+        
+        last_practiced always matches the latest history entry, so only
+        problems practiced since yesterday_start need their history checked.
+        
+        Returns:
+            Tuple of (practiced_today, practiced_yesterday)
+        """
+        today = db.case(
+            (ProblemHistory.practiced_at >= today_start, ProblemHistory.problem_id)
+        )
+        yesterday = db.case(
+            (ProblemHistory.practiced_at < today_start, ProblemHistory.problem_id)
+        )
+        
+        row = db.session.query(
+            db.func.count(db.distinct(today)),
+            db.func.count(db.distinct(yesterday))
+        ).join(Problem, Problem.id == ProblemHistory.problem_id).filter(
+            Problem.user_id == user_id,
+            Problem.last_practiced >= yesterday_start,
+            ProblemHistory.practiced_at >= yesterday_start,
+            ProblemHistory.practiced_at < today_end
+        ).one()
+        
+        return row[0], row[1]
+    
+    @staticmethod
+    def get_difficulty_counts(
+        user_id: int,
+        period_starts: Dict[str, Optional[datetime]]
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Count a user's problems per difficulty for several periods at once.
+        
+        Unbounded periods are read from the problem counts rollup; bounded
+        ones with one range query from the earliest bound, so neither
+        reads the user's whole library.
+        
+        Args:
+            user_id: User ID
+            period_starts: Mapping of period name to its solved_date lower
+                bound, or None for no bound
+        
+        Returns:
+            Mapping of period name to {difficulty: count}.
+        """
+        counts = {name: {} for name in period_starts}
+        
+        if None in period_starts.values():
+            lifetime = {}
+            for difficulty, _, count in ProblemCountRepository.get_for_user(user_id):
+                lifetime[difficulty] = lifetime.get(difficulty, 0) + count
+            for name, start in period_starts.items():
+                if start is None:
+                    counts[name] = dict(lifetime)
+        
+        bounded = [(name, start) for name, start in period_starts.items() if start is not None]
+        if bounded:
+            columns = [
+                db.func.sum(db.case((Problem.solved_date >= start, 1), else_=0))
+                for _, start in bounded
+            ]
+            rows = db.session.query(Problem.difficulty, *columns).filter(
+                Problem.user_id == user_id,
+                Problem.solved_date >= min(start for _, start in bounded)
+            ).group_by(Problem.difficulty).all()
+            
+            for difficulty, *values in rows:
+                for (name, _), value in zip(bounded, values):
+                    counts[name][difficulty] = value or 0
+        return counts
     
     @staticmethod
     def get_paginated(
@@ -104,6 +346,8 @@ class ProblemRepository:
         # Add initial history entry
         history = ProblemHistory(problem_id=problem.id, practiced_at=now)
         db.session.add(history)
+        DailyActivityRepository.record(user_id, now.date(), solves=1, practices=1)
+        ProblemCountRepository.record(user_id, difficulty, 0, 1)
         db.session.commit()
         
         return problem
@@ -117,25 +361,65 @@ class ProblemRepository:
     @staticmethod
     def delete(problem: Problem) -> None:
         """Delete a problem (cascade deletes history)."""
+        practices_by_day = {}
+        for entry in problem.history:
+            day = entry.practiced_at.date()
+            practices_by_day[day] = practices_by_day.get(day, 0) + 1
+        
+        DailyActivityRepository.record(problem.user_id, problem.solved_date.date(), solves=-1)
+        for day, count in practices_by_day.items():
+            DailyActivityRepository.record(problem.user_id, day, practices=-count)
+        ProblemCountRepository.record(problem.user_id, problem.difficulty, problem.practice_count, -1)
+        
         db.session.delete(problem)
         db.session.commit()
     
     @staticmethod
-    def mark_practiced(problem: Problem) -> Problem:
-        """Mark a problem as practiced (increment count, add history)."""
-        problem.last_practiced = datetime.utcnow()
-        problem.practice_count += 1
+    def mark_practiced(problem: Problem, first_since: datetime) -> bool:
+        """
+        Mark a problem as practiced (increment count, add history).
+        
+        Both updates are single statements, so concurrent clicks on the same
+        problem are each counted, and only one of them can be the first
+        practice since first_since.
+        
+        Returns:
+            True if the problem had not been practiced (or first solved)
+            since first_since.
+        """
+        now = datetime.utcnow()
+        user_id, difficulty = problem.user_id, problem.difficulty
+        
+        last_done = db.func.coalesce(Problem.last_practiced, Problem.solved_date)
+        first = Problem.query.filter(
+            Problem.id == problem.id,
+            db.or_(last_done.is_(None), last_done < first_since)
+        ).update({Problem.last_practiced: now}, synchronize_session=False) == 1
         
-        history = ProblemHistory(problem_id=problem.id, practiced_at=datetime.utcnow())
+        practice_count = db.session.execute(
+            db.update(Problem).where(Problem.id == problem.id).values({
+                Problem.last_practiced: now,
+                Problem.practice_count: Problem.practice_count + 1,
+            }).returning(Problem.practice_count).execution_options(synchronize_session=False)
+        ).scalar_one()
+        ProblemCountRepository.move(user_id, difficulty, practice_count - 1, practice_count)
+        
+        history = ProblemHistory(problem_id=problem.id, practiced_at=now)
         db.session.add(history)
+        DailyActivityRepository.record(user_id, now.date(), practices=1)
         db.session.commit()
         
-        return problem
+        return first
     
     @staticmethod
     def add_history_entry(problem: Problem) -> ProblemHistory:
         """Add a practice history entry."""
         now = datetime.utcnow()
+        
+        # The solve moves from its old day to today
+        DailyActivityRepository.record(problem.user_id, problem.solved_date.date(), solves=-1)
+        DailyActivityRepository.record(problem.user_id, now.date(), solves=1, practices=1)
+        
         problem.solved_date = now
         problem.last_practiced = now
         
@@ -144,16 +428,3 @@ class ProblemRepository:
         db.session.commit()
         
         return history
-    
-    @staticmethod
-    def get_history_for_month(
-        user_id: int,
-        start_date: datetime,
-        end_date: datetime
-    ) -> List[ProblemHistory]:
-        """Get practice history entries for a date range."""
-        return db.session.query(ProblemHistory).join(Problem).filter(
-            Problem.user_id == user_id,
-            ProblemHistory.practiced_at >= start_date,
-            ProblemHistory.practiced_at <= end_date
-        ).all()
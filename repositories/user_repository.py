@@ -1,7 +1,8 @@
 """
 User repository - Database operations for users.
 """
-from typing import Optional, List
+from typing import Optional, List, Tuple, Dict
+from datetime import datetime, timedelta
 from extensions import db
 from models import User
 
@@ -56,6 +57,221 @@ class UserRepository:
         return user
     
     @staticmethod
-    def get_users_with_daily_email_enabled() -> List[User]:
-        """Get all users who have daily email enabled."""
-        return User.query.filter(User.daily_email_enabled == True).all()  # noqa: E712
+    def get_stats_version(user_id: int) -> int:
+        """Get the user's stats data version."""
+        return db.session.query(User.stats_version).filter(User.id == user_id).scalar() or 0
+    
+    @staticmethod
+    def bump_stats_version(user_id: int) -> None:
+        """Atomically increment the user's stats data version."""
+        User.query.filter(User.id == user_id).update(
+            {User.stats_version: User.stats_version + 1},
+            synchronize_session=False
+        )
+        db.session.commit()
+    
+    @staticmethod
+    def claim_daily_email_batch(
+        owner: str,
+        utc_now: datetime,
+        lease_seconds: int,
+        limit: int,
+        due_from: Optional[datetime] = None
+    ) -> List[User]:
+        """
+        Lease a batch of users whose daily email is due to one worker.
+        
+        The UPDATE only takes rows whose lease is free or expired and runs
+        as a single statement, so concurrent workers never claim the same
+        user. Leases held by crashed workers expire and are reclaimed.
+        
+        Args:
+            utc_now: Claim users due up to this UTC time
+            due_from: Only claim users due at or after this UTC time,
+                leaving older ones for catch-up
+        """
+        lease_now = datetime.utcnow()
+        lease_free = UserRepository._daily_email_lease_free(lease_now)
+        due_ids = db.select(User.id).where(
+            UserRepository._daily_email_due(utc_now, due_from),
+            lease_free
+        ).order_by(User.next_email_due_at).limit(limit)
+        
+        expires_at = lease_now + timedelta(seconds=lease_seconds)
+        User.query.filter(User.id.in_(due_ids), lease_free).update(
+            {
+                User.daily_email_lease_owner: owner,
+                User.daily_email_lease_expires_at: expires_at,
+            },
+            synchronize_session=False
+        )
+        db.session.commit()
+        
+        return User.query.filter(
+            User.daily_email_lease_owner == owner,
+            User.daily_email_lease_expires_at == expires_at
+        ).all()
+    
+    @staticmethod
+    def get_unleased_users_due_for_daily_email(utc_now: datetime, limit: int) -> List[User]:
+        """
+        Get users whose daily email is due and not leased, without leasing them.
+        
+        Read-only counterpart of claim_daily_email_batch, for previews.
+        """
+        return User.query.filter(
+            UserRepository._daily_email_due(utc_now),
+            UserRepository._daily_email_lease_free(datetime.utcnow())
+        ).order_by(User.next_email_due_at).limit(limit).all()
+    
+    @staticmethod
+    def _daily_email_due(utc_now: datetime, due_from: Optional[datetime] = None):
+        """Filter for enabled users due by utc_now (and since due_from): one range on the due index."""
+        due = db.and_(
+            User.daily_email_enabled == True,  # noqa: E712
+            User.next_email_due_at <= utc_now
+        )
+        if due_from is not None:
+            due = db.and_(due, User.next_email_due_at >= due_from)
+        return due
+    
+    @staticmethod
+    def _daily_email_lease_free(lease_now: datetime):
+        """Filter for users whose daily email lease is free or expired."""
+        return db.or_(
+            User.daily_email_lease_expires_at.is_(None),
+            User.daily_email_lease_expires_at <= lease_now
+        )
+    
+    @staticmethod
+    def get_stale_daily_email_users(stale_before: datetime, limit: int) -> List[User]:
+        """Get unleased users whose daily email has been due since before stale_before."""
+        return User.query.filter(
+            User.daily_email_enabled == True,  # noqa: E712
+            User.next_email_due_at < stale_before,
+            UserRepository._daily_email_lease_free(datetime.utcnow())
+        ).order_by(User.next_email_due_at).limit(limit).all()
+    
+    @staticmethod
+    def skip_stale_daily_emails(stale_before: datetime, next_due_at: Dict[int, datetime]) -> int:
+        """
+        Move stale daily emails on to their next due time, in one UPDATE.
+        
+        Users sent to or leased since they were read are left alone.
+        
+        Returns:
+            Number of users skipped.
+        """
+        if not next_due_at:
+            return 0
+        
+        skipped = User.query.filter(
+            User.id.in_(list(next_due_at)),
+            User.next_email_due_at < stale_before,
+            UserRepository._daily_email_lease_free(datetime.utcnow())
+        ).update(
+            {User.next_email_due_at: db.case(next_due_at, value=User.id)},
+            synchronize_session=False
+        )
+        db.session.commit()
+        return skipped
+    
+    @staticmethod
+    def release_daily_email_lease(user: User) -> None:
+        """Clear a user's daily email lease (caller commits)."""
+        user.daily_email_lease_owner = None
+        user.daily_email_lease_expires_at = None
+    
+    @staticmethod
+    def mark_daily_emails_sent(owner: str, sent_at: datetime, next_due_at: Dict[int, datetime]) -> List[int]:
+        """
+        Record daily emails as sent and release their leases, in one UPDATE.
+        
+        Only users still leased to owner, with the lease unexpired, are
+        marked: a user whose lease ran out may have been claimed by another
+        worker, which will send to them instead.
+        
+        Args:
+            owner: Worker that leased the users
+            sent_at: UTC send time for every user
+            next_due_at: Mapping of user ID to their next due time
+        
+        Returns:
+            IDs of the users marked, the only ones to send to.
+        """
+        if not next_due_at:
+            return []
+        
+        marked = db.session.execute(
+            db.update(User).where(
+                User.id.in_(list(next_due_at)),
+                User.daily_email_lease_owner == owner,
+                User.daily_email_lease_expires_at > datetime.utcnow()
+            ).values({
+                User.daily_email_last_sent_at: sent_at,
+                User.next_email_due_at: db.case(next_due_at, value=User.id),
+                User.daily_email_lease_owner: None,
+                User.daily_email_lease_expires_at: None,
+            }).returning(User.id).execution_options(synchronize_session=False)
+        ).scalars().all()
+        db.session.commit()
+        return marked
+    
+    @staticmethod
+    def revert_daily_emails_sent(
+        previous_sent_at: Dict[int, Optional[datetime]],
+        retry_at: datetime
+    ) -> None:
+        """
+        Undo mark_daily_emails_sent for failed sends, in one UPDATE.
+        
+        Args:
+            previous_sent_at: Mapping of user ID to daily_email_last_sent_at
+                before it was marked
+            retry_at: UTC time to try these users again
+        """
+        if not previous_sent_at:
+            return
+        
+        User.query.filter(User.id.in_(list(previous_sent_at))).update(
+            {
+                User.daily_email_last_sent_at: db.case(
+                    {user_id: db.literal(sent_at, db.DateTime) for user_id, sent_at in previous_sent_at.items()},
+                    value=User.id
+                ),
+                User.next_email_due_at: retry_at,
+            },
+            synchronize_session=False
+        )
+        db.session.commit()
+    
+    @staticmethod
+    def get_next_daily_email_due_at(after_utc: datetime) -> Optional[datetime]:
+        """Get the earliest daily email due time at or after a UTC time (one index seek)."""
+        return db.session.query(db.func.min(User.next_email_due_at)).filter(
+            User.daily_email_enabled == True,  # noqa: E712
+            User.next_email_due_at >= after_utc
+        ).scalar()
+    
+    @staticmethod
+    def get_daily_email_due_times(until_utc: datetime) -> List[Tuple[datetime, int]]:
+        """
+        Get (due_at, user_id) pairs for daily emails due up to a UTC time.
+        
+        Users leased by a worker are returned at their lease expiry, when
+        they can be reclaimed if still due.
+        """
+        lease_now = datetime.utcnow()
+        rows = db.session.query(
+            User.next_email_due_at, User.daily_email_lease_expires_at, User.id
+        ).filter(
+            UserRepository._daily_email_due(until_utc)
+        ).all()
+        
+        due_times = []
+        for due_at, lease_expires_at, user_id in rows:
+            if lease_expires_at and lease_expires_at > lease_now:
+                due_at = max(due_at, lease_expires_at)
+            if due_at <= until_utc:
+                due_times.append((due_at, user_id))
+        return due_times
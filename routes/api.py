@@ -61,11 +61,12 @@ def get_difficulty_stats():
     period = request.args.get('period', 'lifetime')
     
     # Validate period
-    valid_periods = ['today', 'week', 'month', 'year', 'lifetime']
-    if period not in valid_periods:
+    if period not in StatsService.DIFFICULTY_PERIODS:
         period = 'lifetime'
     
-    data = StatsService.get_difficulty_stats(user_id, period)
+    # All periods come from one query; send them so tab switches stay local
+    periods = StatsService.get_difficulty_stats_by_period(user_id)
+    data = dict(periods[period], periods=periods)
     return jsonify(data)
 
 
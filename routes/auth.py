@@ -1,8 +1,8 @@
 """
 Authentication routes - login, register, logout, password management.
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
-from services import AuthService
+from flask import Blueprint, render_template, request, redirect, url_for, flash
+from services import AuthService, EmailOutboxService
 from utils.decorators import require_login
 
 auth_bp = Blueprint('auth', __name__)
@@ -89,15 +89,8 @@ def forgot_password():
         success, message, token = AuthService.request_password_reset(email)
         
         if token:
-            # Send email
-            from urllib.parse import quote
-            from services import EmailService
-            
-            encoded_token = quote(token, safe='')
-            frontend_url = current_app.config.get('FRONTEND_URL', 'http://localhost:5000')
-            reset_link = f"{frontend_url}/reset-password/{encoded_token}"
-            
-            EmailService.send_password_reset_email(email, reset_link)
+            # Reset email was queued with the token
+            EmailOutboxService.kick()
         
         flash(message, 'success')
     
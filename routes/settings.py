@@ -4,7 +4,7 @@ Settings routes - user profile, preferences, email change.
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from zoneinfo import available_timezones
 from sqlalchemy.exc import IntegrityError
-from services import AuthService, AvatarService, EmailService
+from services import AuthService, AvatarService, EmailService, DailyEmailService, EmailOutboxService
 from repositories import UserRepository, AuthRepository
 from extensions import db
 from utils.decorators import require_login
@@ -88,6 +88,7 @@ def update_timezone():
         return redirect(url_for('settings.index'))
     
     user.timezone = tz
+    DailyEmailService.reschedule(user)
     UserRepository.update(user)
     flash('Timezone updated.', 'success')
     
@@ -120,6 +121,7 @@ def update_daily_email():
     
     user.daily_email_enabled = enabled
     user.daily_email_time = send_time
+    DailyEmailService.reschedule(user)
     UserRepository.update(user)
     flash('Daily email settings updated.', 'success')
     
@@ -180,24 +182,28 @@ def request_email_change():
         flash('That email is already in use.', 'error')
         return redirect(url_for('settings.index'))
     
-    # Create request and send codes
-    email_request = AuthRepository.create_email_change_request(user, new_email)
-    
+    # Create request and queue codes in one transaction
     try:
-        EmailService.send_email_verification_code(
+        email_request = AuthRepository.create_email_change_request(user, new_email)
+        EmailService.queue_email_verification_code(
             user.email,
             email_request.current_email_code,
             is_current_email=True
         )
-        EmailService.send_email_verification_code(
+        EmailService.queue_email_verification_code(
             new_email,
             email_request.new_email_code,
             is_current_email=False
         )
-        flash('Verification codes sent to both your current and new email.', 'success')
+        db.session.commit()
     except Exception as e:
-        print(f"Email change send error: {e}")
-        flash('Could not send verification codes. Check email settings and try again.', 'error')
+        db.session.rollback()
+        print(f"Email change request error: {e}")
+        flash('Could not send verification codes. Please try again.', 'error')
+        return redirect(url_for('settings.index'))
+    
+    EmailOutboxService.kick()
+    flash('Verification codes sent to both your current and new email.', 'success')
     
     return redirect(url_for('settings.index'))
 
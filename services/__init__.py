@@ -4,12 +4,15 @@ Services package - Business logic layer.
 Services contain the business logic and orchestrate
 operations between repositories and other services.
 """
+from services.timezone_service import TimezoneService
 from services.auth_service import AuthService
 from services.problem_service import ProblemService
 from services.email_service import EmailService
 from services.avatar_service import AvatarService
 from services.practice_service import PracticeService
 from services.stats_service import StatsService
+from services.daily_email_service import DailyEmailService
+from services.email_outbox_service import EmailOutboxService
 
 __all__ = [
     'AuthService',
@@ -18,4 +21,7 @@ __all__ = [
     'AvatarService',
     'PracticeService',
     'StatsService',
+    'DailyEmailService',
+    'EmailOutboxService',
+    'TimezoneService',
 ]
@@ -2,8 +2,11 @@
 Authentication service - Business logic for auth operations.
 """
 from typing import Optional, Tuple
-from flask import session
+from urllib.parse import quote
+from flask import session, current_app
+from extensions import db
 from repositories import UserRepository, AuthRepository
+from services.email_service import EmailService
 from models import User
 
 
@@ -111,7 +114,10 @@ class AuthService:
     @staticmethod
     def request_password_reset(email: str) -> Tuple[bool, str, Optional[str]]:
         """
-        Create a password reset token.
+        Create a password reset token and queue the reset email.
+        
+        The token and the outbox email are committed together; the caller
+        kicks the outbox dispatcher.
         
         Returns:
             Tuple of (success, message, token or None)
@@ -126,6 +132,13 @@ class AuthService:
             return True, 'If an account exists with this email, a password reset link has been sent.', None
         
         reset_token = AuthRepository.create_reset_token(user)
+        
+        encoded_token = quote(reset_token.token, safe='')
+        frontend_url = current_app.config.get('FRONTEND_URL', 'http://localhost:5000')
+        reset_link = f"{frontend_url}/reset-password/{encoded_token}"
+        EmailService.queue_password_reset_email(user.email, reset_link)
+        db.session.commit()
+        
         return True, 'If an account exists with this email, a password reset link has been sent.', reset_token.token
     
     @staticmethod
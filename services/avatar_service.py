@@ -4,7 +4,6 @@ Avatar service - Business logic for profile picture operations.
 import os
 import secrets
 from typing import Optional, Tuple
-from PIL import Image, ImageOps
 from flask import current_app
 from repositories import UserRepository
 from models import User
@@ -41,6 +40,9 @@ class AvatarService:
         Returns:
             Static-relative path, e.g. 'uploads/avatars/user_1_xxx.png'
         """
+        # Imported here so processes that never resize avatars skip loading Pillow
+        from PIL import Image, ImageOps
+        
         upload_dir = AvatarService._get_upload_dir()
         
         img = Image.open(image_file)
@@ -0,0 +1,83 @@
+"""
+Daily email service - Business logic for scheduling daily practice emails.
+"""
+from typing import Optional, Tuple
+from datetime import datetime, timedelta, time as dtime
+from zoneinfo import ZoneInfo
+from services.timezone_service import TimezoneService, UTC
+from models import User
+
+
+class DailyEmailService:
+    """Service for daily practice email scheduling."""
+    
+    DEFAULT_SEND_TIME = (6, 0)
+    
+    @staticmethod
+    def parse_send_time(send_time: Optional[str]) -> Tuple[int, int]:
+        """Parse an 'HH:MM' send time, falling back to the default."""
+        try:
+            hh, mm = (send_time or '06:00').split(':')
+            return int(hh), int(mm)
+        except ValueError:
+            return DailyEmailService.DEFAULT_SEND_TIME
+    
+    @staticmethod
+    def compute_next_due_at(user: User, utc_now: datetime) -> Optional[datetime]:
+        """
+        Get the next UTC time the user's daily email is due.
+        
+        Due at today's local send time unless already sent today, in which
+        case tomorrow's. A due time in the past means "send now".
+        
+        Returns:
+            Naive UTC datetime, or None if daily email is disabled.
+        """
+        if not user.daily_email_enabled:
+            return None
+        
+        user_tz = TimezoneService.get_user_zone(user)
+        local_day = TimezoneService.local_date(user_tz, utc_now)
+        
+        if user.daily_email_last_sent_at:
+            last_sent_day = TimezoneService.local_date(user_tz, user.daily_email_last_sent_at)
+            if last_sent_day >= local_day:
+                local_day = local_day + timedelta(days=1)
+        
+        return DailyEmailService._send_time_utc(user, user_tz, local_day)
+    
+    @staticmethod
+    def compute_due_after_send(user: User, sent_at: datetime) -> datetime:
+        """
+        Get the UTC time the user's next daily email is due once one is sent at sent_at.
+        
+        Same as compute_next_due_at with daily_email_last_sent_at set to
+        sent_at, without touching the user.
+        """
+        user_tz = TimezoneService.get_user_zone(user)
+        local_day = TimezoneService.local_date(user_tz, sent_at)
+        return DailyEmailService._send_time_utc(user, user_tz, local_day + timedelta(days=1))
+    
+    @staticmethod
+    def compute_next_send_after(user: User, after_utc: datetime) -> datetime:
+        """Get the user's first send time strictly after a UTC time."""
+        user_tz = TimezoneService.get_user_zone(user)
+        local_day = TimezoneService.local_date(user_tz, after_utc)
+        due_at = DailyEmailService._send_time_utc(user, user_tz, local_day)
+        if due_at <= after_utc:
+            due_at = DailyEmailService._send_time_utc(user, user_tz, local_day + timedelta(days=1))
+        return due_at
+    
+    @staticmethod
+    def _send_time_utc(user: User, user_tz: ZoneInfo, local_day) -> datetime:
+        """Get the naive UTC time of the user's send time on a local day."""
+        send_hour, send_minute = DailyEmailService.parse_send_time(user.daily_email_time)
+        due_local = datetime.combine(local_day, dtime(send_hour, send_minute)).replace(tzinfo=user_tz)
+        return due_local.astimezone(UTC).replace(tzinfo=None)
+    
+    @staticmethod
+    def reschedule(user: User, utc_now: Optional[datetime] = None) -> None:
+        """Recompute the user's next_email_due_at (caller commits)."""
+        user.next_email_due_at = DailyEmailService.compute_next_due_at(
+            user, utc_now or datetime.utcnow()
+        )
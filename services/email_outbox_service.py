@@ -0,0 +1,125 @@
+"""
+Email outbox service - Business logic for sending queued transactional emails.
+"""
+import os
+import socket
+import threading
+from typing import Optional, Tuple
+from datetime import datetime, timedelta
+from flask import current_app
+from repositories import EmailOutboxRepository
+from services.email_service import EmailService
+from utils.process_local import ProcessLocal
+
+
+# This process's in-app dispatcher thread's wake event
+_dispatcher = ProcessLocal()
+
+
+class EmailOutboxService:
+    """Service for the transactional email outbox."""
+    
+    @staticmethod
+    def retry_delay(attempts: int) -> timedelta:
+        """Exponential backoff after the given number of failed attempts."""
+        base = current_app.config.get('EMAIL_OUTBOX_RETRY_SECONDS', 30)
+        cap = current_app.config.get('EMAIL_OUTBOX_MAX_RETRY_SECONDS', 3600)
+        return timedelta(seconds=min(base * 2 ** (attempts - 1), cap))
+    
+    @staticmethod
+    def dispatch_pending(owner: Optional[str] = None) -> Tuple[int, int]:
+        """
+        Send due outbox emails until none are left, then delete emails sent
+        more than EMAIL_OUTBOX_RETENTION_DAYS ago.
+        
+        Emails are leased before sending, so the worker and any number of
+        web processes can dispatch at the same time. Each email carries its
+        idempotency key, so a resend after a lost response is dropped by
+        Brevo.
+        
+        Returns:
+            Tuple of (sent, failed attempts)
+        """
+        config = current_app.config
+        owner = owner or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        lease_seconds = config.get('EMAIL_OUTBOX_LEASE_SECONDS', 120)
+        batch_size = config.get('EMAIL_OUTBOX_BATCH_SIZE', 50)
+        max_attempts = config.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 8)
+        timeout = config.get('DAILY_EMAIL_SEND_TIMEOUT', 10)
+        
+        sent = failed = 0
+        while True:
+            messages = EmailOutboxRepository.claim_due(owner, lease_seconds, batch_size)
+            if not messages:
+                break
+            
+            for message in messages:
+                success = EmailService.send_email(
+                    to_email=message.to_email,
+                    subject=message.subject,
+                    html_content=message.html_content,
+                    timeout=timeout,
+                    idempotency_key=message.idempotency_key,
+                    text_content=message.text_content
+                )
+                
+                if success:
+                    EmailOutboxRepository.mark_sent(message)
+                    sent += 1
+                    continue
+                
+                attempts = message.attempts + 1
+                retry_at = None
+                if attempts < max_attempts:
+                    retry_at = datetime.utcnow() + EmailOutboxService.retry_delay(attempts)
+                EmailOutboxRepository.mark_attempt_failed(message, 'Brevo send failed', retry_at)
+                failed += 1
+                
+                if retry_at is None:
+                    print(f"Giving up on outbox email {message.id} after {attempts} attempts")
+        
+        retention_days = config.get('EMAIL_OUTBOX_RETENTION_DAYS', 7)
+        EmailOutboxRepository.delete_sent_before(datetime.utcnow() - timedelta(days=retention_days))
+        
+        return sent, failed
+    
+    @staticmethod
+    def kick() -> None:
+        """
+        Wake this process's dispatcher thread to send newly queued emails.
+        
+        The thread is started on first use in each process (including
+        forked web workers) and also wakes every EMAIL_OUTBOX_POLL_SECONDS
+        for retries. Does nothing if EMAIL_OUTBOX_DISPATCH_IN_APP is off,
+        leaving delivery to the daily email worker.
+        """
+        app = current_app._get_current_object()
+        if not app.config.get('EMAIL_OUTBOX_DISPATCH_IN_APP', True):
+            return
+        
+        _dispatcher.get(lambda: _start_dispatcher(app)).set()
+
+
+def _start_dispatcher(app) -> threading.Event:
+    """Start this process's dispatcher thread; returns the event that wakes it."""
+    wake = threading.Event()
+    threading.Thread(
+        target=_run_dispatcher,
+        args=(app, wake),
+        name='email-outbox',
+        daemon=True
+    ).start()
+    return wake
+
+
+def _run_dispatcher(app, wake: threading.Event) -> None:
+    """In-app dispatcher thread: drain the outbox whenever woken."""
+    poll_seconds = app.config.get('EMAIL_OUTBOX_POLL_SECONDS', 30)
+    while True:
+        wake.wait(poll_seconds)
+        wake.clear()
+        with app.app_context():
+            try:
+                EmailOutboxService.dispatch_pending()
+            except Exception as e:
+                print(f"Email outbox dispatch error: {e}")
@@ -1,149 +1,357 @@
 """
 Email service - Business logic for sending emails via Brevo.
 """
-from typing import Optional
+import re
+import socket
+from typing import Optional, List, Tuple
 import sib_api_v3_sdk
 from sib_api_v3_sdk.rest import ApiException
+from urllib3.connection import HTTPConnection
+from urllib3.exceptions import MaxRetryError, ProtocolError, ReadTimeoutError
 from flask import current_app
+from markupsafe import Markup
+from models import EmailOutbox
+from repositories import EmailOutboxRepository
+from utils.process_local import ProcessLocal
+
+
+# Process-wide Brevo client, keyed by (api_key, host)
+_brevo_api = ProcessLocal()
+
+
+# Marks where each email's content goes in the rendered layout
+_EMAIL_CONTENT_SLOT = '<!--content-->'
+
+# Rendered once per process: layout halves and the daily practice Brevo template
+_rendered_emails = {}
 
 
 class EmailService:
-    """Service for sending emails via Brevo."""
+    """Service for sending emails via Brevo (or the null transport)."""
+    
+    # Brevo's limit on message versions per request
+    BREVO_MAX_MESSAGE_VERSIONS = 1000
+    
+    # EMAIL_TRANSPORT values
+    TRANSPORT_BREVO = 'brevo'
+    TRANSPORT_NULL = 'null'
     
     @staticmethod
-    def send_email(to_email: str, subject: str, html_content: str) -> bool:
+    def _get_brevo_api(api_key: str, host: str = '') -> sib_api_v3_sdk.TransactionalEmailsApi:
+        """
+        Get the process-wide Brevo API client, creating it on first use.
+        
+        Sharing one client shares its urllib3 connection pool, so kept-alive
+        TLS connections are reused across sends and threads. The client is
+        rebuilt in a new process (e.g. a gunicorn worker) or if the API key
+        or host changes.
+        """
+        return _brevo_api.get(lambda: EmailService._create_brevo_api(api_key, host), key=(api_key, host))
+    
+    @staticmethod
+    def _create_brevo_api(api_key: str, host: str) -> sib_api_v3_sdk.TransactionalEmailsApi:
+        """Build a Brevo API client with its own connection pool."""
+        configuration = sib_api_v3_sdk.Configuration()
+        configuration.api_key['api-key'] = api_key
+        if host:
+            configuration.host = host
+        configuration.connection_pool_maxsize = current_app.config.get('BREVO_POOL_MAXSIZE', 10)
+        
+        api_client = sib_api_v3_sdk.ApiClient(configuration)
+        # TCP keep-alive so idle pooled connections survive between ticks
+        api_client.rest_client.pool_manager.connection_pool_kw['socket_options'] = (
+            HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        )
+        return sib_api_v3_sdk.TransactionalEmailsApi(api_client)
+    
+    @staticmethod
+    def _compact_html(html: str) -> str:
+        """Drop the line breaks and indentation between tags."""
+        html = re.sub(r'\s*\n\s*', '\n', html.strip())
+        return re.sub(r'>\n<', '><', html).replace('\n', ' ')
+    
+    @staticmethod
+    def _get_layout(kind: str) -> Tuple[str, str]:
+        """
+        Get the email layout ('html' or 'txt') split around its content slot.
+        
+        The header and footer are static, so they are rendered once per
+        process and every email's content is placed between them.
+        """
+        frontend_url = current_app.config.get('FRONTEND_URL', '')
+        key = ('layout', kind, frontend_url)
+        if key not in _rendered_emails:
+            layout = current_app.jinja_env.get_template(f'email/layout.{kind}').render(
+                content=Markup(_EMAIL_CONTENT_SLOT),
+                frontend_url=frontend_url
+            )
+            if kind == 'html':
+                layout = EmailService._compact_html(layout)
+            before, after = layout.split(_EMAIL_CONTENT_SLOT, 1)
+            _rendered_emails[key] = (before, after)
+        return _rendered_emails[key]
+    
+    @staticmethod
+    def render_email(name: str, **context) -> Tuple[str, str]:
+        """
+        Render an email from templates/email/<name>.html and <name>.txt.
+        
+        Templates are compiled once and cached by Jinja; values in the HTML
+        version are autoescaped.
+        
+        Returns:
+            Tuple of (html_content, text_content)
+        """
+        context.setdefault('frontend_url', current_app.config.get('FRONTEND_URL', ''))
+        env = current_app.jinja_env
+        html = EmailService._compact_html(env.get_template(f'email/{name}.html').render(**context))
+        text = env.get_template(f'email/{name}.txt').render(**context).strip()
+        
+        html_before, html_after = EmailService._get_layout('html')
+        text_before, text_after = EmailService._get_layout('txt')
+        return html_before + html + html_after, text_before + text + text_after
+    
+    @staticmethod
+    def _get_daily_practice_template() -> Tuple[str, str]:
+        """
+        Get the (html, text) Brevo template for daily practice emails.
+        
+        Nothing in it varies per recipient (Brevo fills in each message's
+        params), so it is rendered once per process.
+        """
+        key = ('daily_practice', current_app.config.get('FRONTEND_URL', ''))
+        if key not in _rendered_emails:
+            _rendered_emails[key] = EmailService.render_email('daily_practice')
+        return _rendered_emails[key]
+    
+    @staticmethod
+    def _outcome_unknown(error: Exception) -> bool:
+        """
+        Check if a failed request may still have been delivered.
+        
+        That is the case when its response timed out or the connection
+        dropped, and when Brevo (or a gateway in front of it) answered with
+        a 5xx error after possibly accepting the messages.
+        """
+        if isinstance(error, ApiException):
+            return (error.status or 0) >= 500
+        if isinstance(error, MaxRetryError):
+            error = error.reason
+        return isinstance(error, (ReadTimeoutError, ProtocolError))
+    
+    @staticmethod
+    def _transport_ready() -> bool:
+        """Check that the configured transport can send (Brevo needs an API key)."""
+        if current_app.config.get('EMAIL_TRANSPORT', 'brevo') == EmailService.TRANSPORT_NULL:
+            return True
+        if not current_app.config.get('BREVO_API_KEY', ''):
+            print("BREVO_API_KEY not configured")
+            return False
+        return True
+    
+    @staticmethod
+    def _deliver(send_smtp_email: sib_api_v3_sdk.SendSmtpEmail, timeout: Optional[float]) -> None:
+        """
+        Hand a built message to the configured transport.
+        
+        The null transport accepts everything without any I/O. Brevo errors
+        are raised as ApiException.
+        """
+        if current_app.config.get('EMAIL_TRANSPORT', 'brevo') == EmailService.TRANSPORT_NULL:
+            return
+        
+        api_instance = EmailService._get_brevo_api(
+            current_app.config.get('BREVO_API_KEY', ''),
+            current_app.config.get('BREVO_API_HOST', '')
+        )
+        # The SDK ignores a float timeout; a (connect, read) pair takes any number
+        if timeout is not None:
+            timeout = (timeout, timeout)
+        api_instance.send_transac_email(send_smtp_email, _request_timeout=timeout)
+    
+    @staticmethod
+    def send_email(
+        to_email: str,
+        subject: str,
+        html_content: str,
+        timeout: Optional[float] = None,
+        params: Optional[dict] = None,
+        idempotency_key: Optional[str] = None,
+        text_content: Optional[str] = None
+    ) -> Optional[bool]:
         """
         Send an email via Brevo.
         
+        Args:
+            timeout: HTTP request timeout in seconds (defaults to none)
+            params: Values for {{ params.* }} placeholders in the content
+            idempotency_key: Lets Brevo drop repeats of the same message
+            text_content: Plain-text alternative to html_content
+        
         Returns:
-            True if sent successfully, False otherwise
+            True if sent successfully, False if not, None if the request
+            may have been delivered but no success response arrived (a
+            timeout or 5xx; falsy, so callers that retry should send an
+            idempotency key)
         """
-        api_key = current_app.config.get('BREVO_API_KEY', '')
         from_email = current_app.config.get('BREVO_FROM_EMAIL', '')
         from_name = current_app.config.get('BREVO_FROM_NAME', 'CodingFlashcard')
         
-        if not api_key:
-            print("BREVO_API_KEY not configured")
+        if not EmailService._transport_ready():
             return False
         
         try:
-            configuration = sib_api_v3_sdk.Configuration()
-            configuration.api_key['api-key'] = api_key
-            
-            api_instance = sib_api_v3_sdk.TransactionalEmailsApi(
-                sib_api_v3_sdk.ApiClient(configuration)
-            )
-            
             send_smtp_email = sib_api_v3_sdk.SendSmtpEmail(
                 to=[{"email": to_email}],
                 sender={"name": from_name, "email": from_email},
                 subject=subject,
                 html_content=html_content,
+                text_content=text_content,
+                params=params,
+                headers={"idempotencyKey": idempotency_key} if idempotency_key else None,
             )
             
-            api_instance.send_transac_email(send_smtp_email)
+            EmailService._deliver(send_smtp_email, timeout)
             return True
             
         except ApiException as e:
             print(f"Error sending email: {e}")
-            return False
+            return None if EmailService._outcome_unknown(e) else False
         except Exception as e:
             print(f"Unexpected error sending email: {e}")
-            return False
+            return None if EmailService._outcome_unknown(e) else False
     
     @staticmethod
-    def send_password_reset_email(email: str, reset_link: str) -> bool:
-        """Send password reset email."""
-        html_content = f"""
-        <h2>Password Reset Request</h2>
-        <p>You requested a password reset for your CodingFlashcard account.</p>
-        <p>Click the link below to reset your password:</p>
-        <p><a href="{reset_link}">{reset_link}</a></p>
-        <p>This link will expire in 1 hour.</p>
-        <p>If you didn't request this, please ignore this email.</p>
-        """
-        return EmailService.send_email(
+    def queue_password_reset_email(email: str, reset_link: str) -> EmailOutbox:
+        """Queue password reset email (caller commits)."""
+        html_content, text_content = EmailService.render_email('password_reset', reset_link=reset_link)
+        return EmailOutboxRepository.enqueue(
             to_email=email,
             subject="Password Reset - CodingFlashcard",
-            html_content=html_content
+            html_content=html_content,
+            text_content=text_content
         )
     
     @staticmethod
-    def send_email_verification_code(
+    def queue_email_verification_code(
         email: str,
         code: str,
         is_current_email: bool = True
-    ) -> bool:
-        """Send email verification code for email change."""
+    ) -> EmailOutbox:
+        """Queue email verification code for email change (caller commits)."""
         email_type = "current" if is_current_email else "new"
-        html_content = f"""
-        <h2>Email change verification</h2>
-        <p>Use this code to verify your <b>{email_type}</b> email address:</p>
-        <p style="font-size:24px;font-weight:700;letter-spacing:2px;">{code}</p>
-        <p>This code expires in 10 minutes.</p>
-        """
-        return EmailService.send_email(
+        html_content, text_content = EmailService.render_email(
+            'email_verification_code', code=code, email_type=email_type
+        )
+        return EmailOutboxRepository.enqueue(
             to_email=email,
             subject=f"Verify email change ({email_type} email) - CodingFlashcard",
-            html_content=html_content
+            html_content=html_content,
+            text_content=text_content
         )
     
+    @staticmethod
+    def _daily_practice_params(date_label: str, practice_items: list) -> dict:
+        """Build the Brevo params for one daily practice email."""
+        return {
+            'date_label': date_label,
+            'problems': [
+                {
+                    'title': item['title'],
+                    'leetcode_url': item['leetcode_url'],
+                    'difficulty': item['difficulty'].upper()
+                }
+                for item in practice_items
+            ]
+        }
+    
+    @staticmethod
+    def _daily_practice_subject(date_label: str) -> str:
+        """Subject line for a daily practice email."""
+        return f"Today's practice - CodingFlashcard ({date_label})"
+    
     @staticmethod
     def send_daily_practice_email(
         email: str,
         date_label: str,
-        practice_items: list
-    ) -> bool:
-        """Send daily practice reminder email."""
-        if practice_items:
-            rows = "\n".join([
-                f"""
-                <tr>
-                  <td style="padding:10px 12px;border-bottom:1px solid #eee;">
-                    <a href="{item['leetcode_url']}" style="color:#111;text-decoration:none;font-weight:700;">
-                      {item['title']}
-                    </a>
-                    <div style="margin-top:4px;color:#666;font-size:12px;">{item['leetcode_url']}</div>
-                  </td>
-                  <td style="padding:10px 12px;border-bottom:1px solid #eee;text-align:right;white-space:nowrap;">
-                    <span style="display:inline-block;padding:4px 10px;border-radius:999px;border:2px solid #111;font-weight:900;font-size:12px;">
-                      {item['difficulty'].upper()}
-                    </span>
-                  </td>
-                </tr>
-                """.strip()
-                for item in practice_items
-            ])
-            
-            html_content = f"""
-            <div style="font-family:system-ui,-apple-system,Segoe UI,Roboto,Helvetica,Arial,sans-serif;">
-              <h2 style="margin:0 0 8px 0;">Today's practice list</h2>
-              <div style="color:#666;margin-bottom:14px;">{date_label} • CodingFlashcard</div>
-              <table style="width:100%;border-collapse:collapse;border:2px solid #111;border-radius:14px;overflow:hidden;">
-                <thead>
-                  <tr>
-                    <th style="text-align:left;padding:10px 12px;background:#111;color:#fff;">Problem</th>
-                    <th style="text-align:right;padding:10px 12px;background:#111;color:#fff;">Difficulty</th>
-                  </tr>
-                </thead>
-                <tbody>
-                  {rows}
-                </tbody>
-              </table>
-              <p style="color:#666;margin-top:14px;">Tip: open a problem, solve it, then hit "Done".</p>
-            </div>
-            """
-        else:
-            html_content = f"""
-            <div style="font-family:system-ui,-apple-system,Segoe UI,Roboto,Helvetica,Arial,sans-serif;">
-              <h2 style="margin:0 0 8px 0;">No practice items today</h2>
-              <div style="color:#666;margin-bottom:14px;">{date_label} • CodingFlashcard</div>
-              <p style="color:#111;">You're all caught up. Add more problems to keep your spaced repetition going.</p>
-            </div>
-            """
-        
+        practice_items: list,
+        timeout: Optional[float] = None
+    ) -> Optional[bool]:
+        """Send daily practice reminder email (result as for send_email)."""
+        html_content, text_content = EmailService._get_daily_practice_template()
         return EmailService.send_email(
             to_email=email,
-            subject=f"Today's practice - CodingFlashcard ({date_label})",
-            html_content=html_content
+            subject=EmailService._daily_practice_subject(date_label),
+            html_content=html_content,
+            timeout=timeout,
+            params=EmailService._daily_practice_params(date_label, practice_items),
+            text_content=text_content
         )
+    
+    @staticmethod
+    def send_daily_practice_emails_batch(
+        recipients: List[Tuple[str, str, list]],
+        timeout: Optional[float] = None
+    ) -> List[Optional[bool]]:
+        """
+        Send daily practice emails to many recipients in one Brevo request.
+        
+        Each recipient is a message version with its own subject and params,
+        rendered by Brevo from the shared template. Brevo rejects the whole
+        request if any version is invalid, so on a 4xx error (other than
+        rate limiting) every recipient is sent individually to find out
+        which ones failed.
+        
+        Args:
+            recipients: List of (email, date_label, practice_items) tuples,
+                at most BREVO_MAX_MESSAGE_VERSIONS
+            timeout: HTTP request timeout in seconds (defaults to none)
+        
+        Returns:
+            List of send results as for send_email, in the same order as
+            recipients.
+        """
+        if not recipients:
+            return []
+        if len(recipients) == 1:
+            return [EmailService.send_daily_practice_email(*recipients[0], timeout=timeout)]
+        
+        from_email = current_app.config.get('BREVO_FROM_EMAIL', '')
+        from_name = current_app.config.get('BREVO_FROM_NAME', 'CodingFlashcard')
+        
+        if not EmailService._transport_ready():
+            return [False] * len(recipients)
+        
+        try:
+            html_content, text_content = EmailService._get_daily_practice_template()
+            message_versions = [
+                sib_api_v3_sdk.SendSmtpEmailMessageVersions(
+                    to=[{"email": email}],
+                    subject=EmailService._daily_practice_subject(date_label),
+                    params=EmailService._daily_practice_params(date_label, practice_items)
+                )
+                for email, date_label, practice_items in recipients
+            ]
+            send_smtp_email = sib_api_v3_sdk.SendSmtpEmail(
+                sender={"name": from_name, "email": from_email},
+                subject=message_versions[0].subject,
+                html_content=html_content,
+                text_content=text_content,
+                message_versions=message_versions,
+            )
+            
+            EmailService._deliver(send_smtp_email, timeout)
+            return [True] * len(recipients)
+            
+        except ApiException as e:
+            print(f"Error sending batch of {len(recipients)} emails: {e.status} {e.reason}")
+            if e.status and 400 <= e.status < 500 and e.status != 429:
+                return [
+                    EmailService.send_daily_practice_email(*recipient, timeout=timeout)
+                    for recipient in recipients
+                ]
+            return [None if EmailService._outcome_unknown(e) else False] * len(recipients)
+        except Exception as e:
+            print(f"Unexpected error sending batch of {len(recipients)} emails: {e}")
+            return [None if EmailService._outcome_unknown(e) else False] * len(recipients)
+
@@ -1,27 +1,27 @@
 """
 Practice service - Business logic for spaced repetition practice.
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from datetime import datetime, timedelta
+import hashlib
 import random
 from zoneinfo import ZoneInfo
 from repositories import ProblemRepository
 from models import User, Problem
+from services.timezone_service import TimezoneService, UTC
 
 
 class PracticeService:
     """Service for practice-related operations."""
     
     PRACTICE_INTERVALS = [2, 5, 10, 30]  # Days ago
+    WEEKEND_RANDOM_PICKS = 2
+    BULK_USERS_PER_QUERY = 250  # Keeps bulk queries under SQLite's bound parameter limit
     
     @staticmethod
     def get_user_timezone(user: User) -> ZoneInfo:
         """Get user's timezone as ZoneInfo object."""
-        tz_name = (getattr(user, 'timezone', None) or 'UTC').strip()
-        try:
-            return ZoneInfo(tz_name)
-        except Exception:
-            return ZoneInfo('UTC')
+        return TimezoneService.get_user_zone(user)
     
     @staticmethod
     def _local_day_bounds_to_utc(
@@ -34,12 +34,85 @@ class PracticeService:
         Returns:
             Tuple of (start_utc_naive, end_utc_naive) covering local_day [00:00, 24:00)
         """
-        from datetime import time as dtime
-        start_local = datetime.combine(local_day, dtime.min).replace(tzinfo=user_tz)
-        end_local = start_local + timedelta(days=1)
-        start_utc = start_local.astimezone(ZoneInfo('UTC')).replace(tzinfo=None)
-        end_utc = end_local.astimezone(ZoneInfo('UTC')).replace(tzinfo=None)
-        return start_utc, end_utc
+        return TimezoneService.day_bounds_utc(user_tz, local_day)
+    
+    @staticmethod
+    def get_interval_windows(
+        user_tz: ZoneInfo,
+        local_today
+    ) -> List[Tuple[int, datetime, datetime]]:
+        """
+        Get the UTC bounds of each practice interval's local day.
+        
+        Returns:
+            List of (days_ago, start_utc_naive, end_utc_naive) tuples
+        """
+        return list(TimezoneService.interval_windows(
+            user_tz, local_today, tuple(PracticeService.PRACTICE_INTERVALS)
+        ))
+    
+    @staticmethod
+    def get_scheduled_problems(
+        user_id: int,
+        local_today,
+        user_tz: ZoneInfo = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Resolve the spaced repetition schedule for a user's local day.
+        
+        All interval buckets are fetched with a single range query; on
+        weekends a couple of random problems are added on top.
+        
+        Returns:
+            List of dicts with 'problem' (Problem object) and 'category' (str),
+            ordered by interval.
+        """
+        user_tz = user_tz or UTC
+        windows = PracticeService.get_interval_windows(user_tz, local_today)
+        
+        scheduled = []
+        problem_ids = set()
+        
+        for problem, days_ago in ProblemRepository.get_problems_in_windows(user_id, windows):
+            if problem.id not in problem_ids:
+                problem_ids.add(problem.id)
+                scheduled.append({
+                    'problem': problem,
+                    'category': f'Solved {days_ago} days ago'
+                })
+        
+        # Weekend random problems (Saturday=5, Sunday=6)
+        if local_today.weekday() in [5, 6]:
+            for problem in PracticeService._get_weekend_picks(user_id, local_today, problem_ids):
+                problem_ids.add(problem.id)
+                scheduled.append({
+                    'problem': problem,
+                    'category': 'Random Practice'
+                })
+        
+        return scheduled
+    
+    @staticmethod
+    def _weekend_pick_offsets(user_id: int, local_day, available: int) -> List[int]:
+        """
+        Choose which of the available problems to pick, by position in id order.
+        
+        Seeded from a stable hash of user and date (not the salted built-in
+        hash), so every process and caller picks the same problems that day.
+        """
+        digest = hashlib.sha256(f"{user_id}:{local_day.isoformat()}".encode()).digest()
+        rng = random.Random(int.from_bytes(digest[:8], 'big'))
+        return rng.sample(range(available), min(PracticeService.WEEKEND_RANDOM_PICKS, available))
+    
+    @staticmethod
+    def _get_weekend_picks(user_id: int, local_day, exclude_ids: set) -> List[Problem]:
+        """Get the day's random picks from problems not already scheduled."""
+        available = ProblemRepository.count_problems(user_id) - len(exclude_ids)
+        if available <= 0:
+            return []
+        
+        offsets = PracticeService._weekend_pick_offsets(user_id, local_day, available)
+        return ProblemRepository.get_problems_at_offsets(user_id, exclude_ids, offsets)
     
     @staticmethod
     def get_problems_to_practice(user_id: int) -> Dict[str, List[Dict[str, Any]]]:
@@ -51,37 +124,7 @@ class PracticeService:
             Each problem dict has 'problem' (Problem object) and 'solved_recently' (bool).
         """
         today = datetime.utcnow().date()
-        problems = []
-        problem_ids = set()
-        
-        # Problems solved N days ago
-        for days_ago in PracticeService.PRACTICE_INTERVALS:
-            target_date = today - timedelta(days=days_ago)
-            date_problems = ProblemRepository.get_problems_by_solved_date(user_id, target_date)
-            
-            for problem in date_problems:
-                if problem.id not in problem_ids:
-                    problem_ids.add(problem.id)
-                    problems.append({
-                        'problem': problem,
-                        'category': f'Solved {days_ago} days ago'
-                    })
-        
-        # Weekend random problems (Saturday=5, Sunday=6)
-        if today.weekday() in [5, 6]:
-            remaining = ProblemRepository.get_problems_excluding_ids(user_id, problem_ids)
-            if remaining:
-                # Use date-based seed for consistent random selection per day
-                date_str = today.strftime('%m-%d-%Y')
-                random.seed(hash(date_str))
-                random.shuffle(remaining)
-                
-                for problem in remaining[:min(2, len(remaining))]:
-                    problem_ids.add(problem.id)
-                    problems.append({
-                        'problem': problem,
-                        'category': 'Random Practice'
-                    })
+        problems = PracticeService.get_scheduled_problems(user_id, today)
         
         # Group by category and add solved_recently flag
         grouped = {}
@@ -109,53 +152,84 @@ class PracticeService:
         return grouped
     
     @staticmethod
-    def get_practice_items_for_email(user: User, utc_now: datetime) -> List[Dict[str, str]]:
+    def get_practice_items_for_users(
+        users: List[User],
+        utc_now: datetime
+    ) -> Dict[int, List[Dict[str, str]]]:
         """
-        Get today's practice list for email (timezone-aware).
+        Get today's email practice lists for many users at once.
+        
+        Users are grouped into timezone cohorts, which share their local
+        day and interval windows, and each chunk of a cohort is resolved
+        with a few fixed-shape queries instead of several per user. Lists
+        and weekend picks match get_scheduled_problems.
         
         Returns:
-            List of dicts with title, leetcode_url, difficulty.
+            Mapping of user ID to list of dicts with title, leetcode_url,
+            difficulty, ordered by interval.
         """
-        user_tz = PracticeService.get_user_timezone(user)
-        local_now = utc_now.replace(tzinfo=ZoneInfo('UTC')).astimezone(user_tz)
-        local_today = local_now.date()
+        items = {}
+        chunk_size = PracticeService.BULK_USERS_PER_QUERY
+        for user_tz, cohort in TimezoneService.group_by_zone(users).items():
+            local_today = TimezoneService.local_date(user_tz, utc_now)
+            windows = PracticeService.get_interval_windows(user_tz, local_today)
+            for i in range(0, len(cohort), chunk_size):
+                items.update(PracticeService._get_practice_items_for_chunk(
+                    cohort[i:i + chunk_size], local_today, windows
+                ))
+        return items
+    
+    @staticmethod
+    def _get_practice_items_for_chunk(
+        users: List[User],
+        local_today,
+        windows: List[Tuple[int, datetime, datetime]]
+    ) -> Dict[int, List[Dict[str, str]]]:
+        """Resolve practice lists for one chunk of a timezone cohort."""
+        user_ids = [user.id for user in users]
+        interval_order = {days_ago: i for i, days_ago in enumerate(PracticeService.PRACTICE_INTERVALS)}
+        rows = sorted(
+            ProblemRepository.get_email_items_in_windows(user_ids, windows),
+            key=lambda row: interval_order[row[1]]
+        )
         
-        items = []
-        seen_ids = set()
+        items = {user_id: [] for user_id in user_ids}
+        scheduled_ids = {user_id: set() for user_id in user_ids}
+        for user_id, _, problem_id, title, leetcode_url, difficulty in rows:
+            if problem_id not in scheduled_ids[user_id]:
+                scheduled_ids[user_id].add(problem_id)
+                items[user_id].append({
+                    'title': title,
+                    'leetcode_url': leetcode_url,
+                    'difficulty': difficulty
+                })
         
-        # Problems solved N days ago (based on user's local date)
-        for days_ago in PracticeService.PRACTICE_INTERVALS:
-            target_local_day = local_today - timedelta(days=days_ago)
-            start_utc, end_utc = PracticeService._local_day_bounds_to_utc(user_tz, target_local_day)
-            
-            problems = ProblemRepository.get_problems_in_date_range(
-                user.id, start_utc, end_utc
-            )
-            
-            for p in problems:
-                if p.id not in seen_ids:
-                    seen_ids.add(p.id)
-                    items.append({
-                        'title': p.title,
-                        'leetcode_url': p.leetcode_url,
-                        'difficulty': p.difficulty
-                    })
-        
-        # Weekend random problems
-        if local_today.weekday() in [5, 6]:
-            remaining = ProblemRepository.get_problems_excluding_ids(user.id, seen_ids)
-            
-            date_str = local_today.strftime('%m-%d-%Y')
-            random.seed(hash(f"{user.id}-{date_str}"))
-            random.shuffle(remaining)
-            
-            for p in remaining[:min(2, len(remaining))]:
-                if p.id not in seen_ids:
-                    seen_ids.add(p.id)
-                    items.append({
-                        'title': p.title,
-                        'leetcode_url': p.leetcode_url,
-                        'difficulty': p.difficulty
-                    })
+        # Weekend random problems (Saturday=5, Sunday=6)
+        if local_today.weekday() not in [5, 6]:
+            return items
+        
+        exclude_ids = set().union(*scheduled_ids.values())
+        totals = ProblemRepository.count_problems_by_user(user_ids)
+        
+        picks = []
+        for user_id in user_ids:
+            available = totals.get(user_id, 0) - len(scheduled_ids[user_id])
+            if available > 0:
+                offsets = PracticeService._weekend_pick_offsets(user_id, local_today, available)
+                picks.extend((user_id, offset) for offset in offsets)
+        
+        picked = {
+            (user_id, offset): (title, leetcode_url, difficulty)
+            for user_id, offset, _, title, leetcode_url, difficulty
+            in ProblemRepository.get_email_items_at_offsets(picks, exclude_ids)
+        }
+        for user_id, offset in picks:
+            if (user_id, offset) in picked:
+                title, leetcode_url, difficulty = picked[(user_id, offset)]
+                items[user_id].append({
+                    'title': title,
+                    'leetcode_url': leetcode_url,
+                    'difficulty': difficulty
+                })
         
         return items
@@ -1,18 +1,18 @@
 """
 Problem service - Business logic for problem operations.
 """
-from typing import Optional, Tuple, List, Set
+from typing import Optional, Tuple, List
 from datetime import datetime, timedelta
 from urllib.parse import urlparse
-from repositories import ProblemRepository, DailyGoalRepository
-from models import Problem
+from flask import current_app
+from repositories import ProblemRepository, DailyGoalRepository, UserRepository, ProblemCatalogRepository
+from services.practice_service import PracticeService
+from models import Problem, DailyGoal
 
 
 class ProblemService:
     """Service for problem-related operations."""
     
-    PRACTICE_INTERVALS = [2, 5, 10, 30]  # Days ago
-    
     @staticmethod
     def add_problem(
         user_id: int,
@@ -36,11 +36,10 @@ class ProblemService:
         
         if existing:
             ProblemRepository.add_history_entry(existing)
+            UserRepository.bump_stats_version(user_id)
             return True, 'Problem already exists. Added to history!'
         
-        # Try to scrape problem details
-        from utils.scraper import scrape_leetcode_problem
-        problem_data = scrape_leetcode_problem(leetcode_url)
+        problem_data = ProblemService._get_problem_details(leetcode_url)
         
         if not problem_data:
             # Extract from URL as fallback
@@ -62,73 +61,100 @@ class ProblemService:
             leetcode_url=leetcode_url,
             difficulty=difficulty
         )
+        UserRepository.bump_stats_version(user_id)
         
         return True, 'Problem added successfully!'
     
+    @staticmethod
+    def _get_problem_details(leetcode_url: str) -> Optional[dict]:
+        """
+        Get a problem's title and difficulty, from the shared catalog if possible.
+        
+        Problems are scraped only when no other user has added them within
+        PROBLEM_CATALOG_TTL_SECONDS. A stale entry is still used if the
+        re-scrape fails.
+        
+        Returns:
+            dict with 'title' and 'difficulty' keys, or None if unknown
+        """
+        slug = ProblemService._get_slug(leetcode_url)
+        entry = ProblemCatalogRepository.get(slug) if slug else None
+        
+        ttl_seconds = current_app.config.get('PROBLEM_CATALOG_TTL_SECONDS', 30 * 24 * 3600)
+        if entry and entry.fetched_at >= datetime.utcnow() - timedelta(seconds=ttl_seconds):
+            return {'title': entry.title, 'difficulty': entry.difficulty}
+        
+        # Try to scrape problem details
+        from utils.scraper import scrape_leetcode_problem
+        problem_data = scrape_leetcode_problem(leetcode_url)
+        
+        if problem_data and slug:
+            ProblemCatalogRepository.upsert(slug, problem_data['title'], problem_data['difficulty'])
+        elif not problem_data and entry:
+            problem_data = {'title': entry.title, 'difficulty': entry.difficulty}
+        
+        return problem_data
+    
+    @staticmethod
+    def _get_slug(url: str) -> Optional[str]:
+        """Get the problem slug from a Leetcode URL (e.g. 'two-sum')."""
+        path_parts = urlparse(url).path.strip('/').split('/')
+        
+        if 'problems' in path_parts:
+            idx = path_parts.index('problems')
+            if idx + 1 < len(path_parts) and path_parts[idx + 1]:
+                return path_parts[idx + 1].lower()
+        
+        return None
+    
     @staticmethod
     def _extract_from_url(
         url: str,
         form_difficulty: Optional[str] = None
     ) -> Optional[dict]:
         """Extract problem info from URL slug."""
-        parsed = urlparse(url)
-        path_parts = parsed.path.strip('/').split('/')
-        
-        if 'problems' in path_parts:
-            idx = path_parts.index('problems')
-            if idx + 1 < len(path_parts):
-                slug = path_parts[idx + 1]
-                title = ' '.join(word.capitalize() for word in slug.split('-'))
-                difficulty = form_difficulty if form_difficulty in ['easy', 'medium', 'hard'] else 'medium'
-                return {'title': title, 'difficulty': difficulty}
+        slug = ProblemService._get_slug(url)
+        if not slug:
+            return None
         
-        return None
+        title = ' '.join(word.capitalize() for word in slug.split('-'))
+        difficulty = form_difficulty if form_difficulty in ['easy', 'medium', 'hard'] else 'medium'
+        return {'title': title, 'difficulty': difficulty}
     
     @staticmethod
-    def _get_scheduled_problem_ids(user_id: int) -> Set[int]:
-        """Get the set of problem IDs scheduled for practice today."""
-        today = datetime.utcnow().date()
-        problem_ids = set()
-        
-        # Problems solved N days ago
-        for days_ago in ProblemService.PRACTICE_INTERVALS:
-            target_date = today - timedelta(days=days_ago)
-            date_problems = ProblemRepository.get_problems_by_solved_date(user_id, target_date)
-            for p in date_problems:
-                problem_ids.add(p.id)
-        
-        # Weekend random problems (Saturday=5, Sunday=6)
-        if today.weekday() in [5, 6]:
-            remaining = ProblemRepository.get_problems_excluding_ids(user_id, problem_ids)
-            if remaining:
-                import random
-                date_str = today.strftime('%m-%d-%Y')
-                random.seed(hash(date_str))
-                random.shuffle(remaining)
-                for p in remaining[:min(2, len(remaining))]:
-                    problem_ids.add(p.id)
-        
-        return problem_ids
+    def _is_solved_since(problem: Problem, since: datetime) -> bool:
+        """Check if a problem was practiced (or first solved) since a UTC time."""
+        if problem.last_practiced:
+            return problem.last_practiced >= since
+        if problem.solved_date:
+            return problem.solved_date >= since
+        return False
     
     @staticmethod
-    def _count_completed_today(user_id: int, scheduled_ids: Set[int]) -> int:
-        """Count how many scheduled problems were completed today."""
-        today = datetime.utcnow().date()
-        twelve_hours_ago = datetime.utcnow() - timedelta(hours=12)
-        
-        completed = 0
-        for problem_id in scheduled_ids:
-            problem = ProblemRepository.get_by_id(problem_id, user_id)
-            if not problem:
-                continue
-            
-            # Check if practiced today (within last 12 hours to match dashboard logic)
-            if problem.last_practiced and problem.last_practiced >= twelve_hours_ago:
-                completed += 1
-            elif problem.solved_date and problem.solved_date >= twelve_hours_ago:
-                completed += 1
+    def _get_daily_goal(user_id: int, today, day_start: datetime) -> DailyGoal:
+        """
+        Get today's goal, computing and storing the schedule on first use.
         
-        return completed
+        The schedule is resolved once per day; later clicks reuse the
+        stored problem IDs.
+        """
+        goal = DailyGoalRepository.get_for_date(user_id, today)
+        if goal and goal.scheduled_ids is not None:
+            return goal
+        
+        scheduled = PracticeService.get_scheduled_problems(user_id, today)
+        scheduled_ids = {item['problem'].id for item in scheduled}
+        completed = sum(
+            1 for item in scheduled
+            if ProblemService._is_solved_since(item['problem'], day_start)
+        )
+        
+        return DailyGoalRepository.create_with_schedule(
+            user_id=user_id,
+            goal_date=today,
+            scheduled_ids=scheduled_ids,
+            completed=completed
+        )
     
     @staticmethod
     def mark_done(user_id: int, problem_id: int) -> Tuple[bool, str]:
@@ -143,23 +169,22 @@ class ProblemService:
         if not problem:
             return False, 'Problem not found.'
         
-        ProblemRepository.mark_practiced(problem)
+        now = datetime.utcnow()
+        today = now.date()
+        day_start = datetime.combine(today, datetime.min.time())
         
-        # Update daily goal tracking
-        today = datetime.utcnow().date()
-        scheduled_ids = ProblemService._get_scheduled_problem_ids(user_id)
-        total_scheduled = len(scheduled_ids)
+        # Resolve the goal before marking, so the count reflects prior state.
+        # Goals are per UTC day, so "done" means practiced since midnight,
+        # not within the dashboard's 12-hour window.
+        goal = ProblemService._get_daily_goal(user_id, today, day_start)
         
-        # Count completed (including the one just marked)
-        completed = ProblemService._count_completed_today(user_id, scheduled_ids)
+        # Count each scheduled problem once per day: only the click whose
+        # update finds it not yet done today counts, even if clicks overlap
+        first_today = ProblemRepository.mark_practiced(problem, day_start)
+        UserRepository.bump_stats_version(user_id)
         
-        # Update or create daily goal record
-        DailyGoalRepository.create_or_update(
-            user_id=user_id,
-            goal_date=today,
-            total_scheduled=total_scheduled,
-            completed=completed
-        )
+        if first_today and problem_id in goal.get_scheduled_ids():
+            DailyGoalRepository.increment_completed(user_id, today)
         
         return True, 'Problem marked as done!'
     
@@ -177,6 +202,7 @@ class ProblemService:
             return False, 'Problem not found.'
         
         ProblemRepository.delete(problem)
+        UserRepository.bump_stats_version(user_id)
         return True, 'Problem deleted successfully!'
     
     @staticmethod
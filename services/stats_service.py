@@ -1,17 +1,113 @@
 """
 Stats service - Business logic for practice statistics.
 """
-from typing import Dict, Any, List
-from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Tuple
+from datetime import datetime, date, timedelta
 from calendar import monthrange
-from repositories import ProblemRepository
-from models import Problem
+from collections import OrderedDict
+from functools import wraps
+import copy
+import threading
+import time
+from flask import current_app
+from repositories import ProblemRepository, DailyActivityRepository, UserRepository
+
+
+class StatsCache:
+    """
+    Bounded, thread-safe LRU cache with a TTL.
+    
+    Keys include the user's stats version, so writes never evict anything
+    here; entries for old versions simply fall out of the LRU.
+    """
+    
+    def __init__(self, max_entries: int = 2048, ttl_seconds: int = 300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key) -> Tuple[bool, Any]:
+        """Look up a key. Returns (found, value)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+    
+    def set(self, key, value) -> None:
+        """Store a value, evicting the least recently used entries over the cap."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop all entries and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def info(self) -> Dict[str, int]:
+        """Get hit/miss counters and current size."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'max_entries': self.max_entries
+            }
+
+
+_stats_cache: Optional[StatsCache] = None
+_stats_cache_lock = threading.Lock()
+
+
+def get_stats_cache() -> StatsCache:
+    """Get the process-wide stats cache, creating it from app config."""
+    global _stats_cache
+    if _stats_cache is None:
+        with _stats_cache_lock:
+            if _stats_cache is None:
+                _stats_cache = StatsCache(
+                    max_entries=current_app.config.get('STATS_CACHE_MAX_ENTRIES', 2048),
+                    ttl_seconds=current_app.config.get('STATS_CACHE_TTL_SECONDS', 300)
+                )
+    return _stats_cache
+
+
+def _cached(func):
+    """Cache a per-user stats method by user, stats version and UTC date."""
+    @wraps(func)
+    def wrapper(user_id: int, *args):
+        cache = get_stats_cache()
+        version = UserRepository.get_stats_version(user_id)
+        key = (func.__name__, user_id, version, datetime.utcnow().date(), args)
+        
+        found, value = cache.get(key)
+        if not found:
+            value = func(user_id, *args)
+            cache.set(key, value)
+        
+        # Callers may add keys to the result
+        return copy.deepcopy(value)
+    return wrapper
 
 
 class StatsService:
     """Service for statistics calculations."""
     
     @staticmethod
+    @_cached
     def get_practice_stats(user_id: int) -> Dict[str, int]:
         """
         Calculate practice statistics for a user.
@@ -19,52 +115,24 @@ class StatsService:
         Returns:
             Dictionary with stats counts.
         """
-        all_problems = ProblemRepository.get_all_for_user(user_id)
-        today = datetime.utcnow().date()
-        yesterday = today - timedelta(days=1)
+        today_start = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+        yesterday_start = today_start - timedelta(days=1)
+        tomorrow_start = today_start + timedelta(days=1)
         
         # Count by practice level
-        fully_practiced = sum(1 for p in all_problems if p.practice_count >= 3)
-        partially_practiced = sum(1 for p in all_problems if p.practice_count == 2)
-        solved_once = sum(1 for p in all_problems if p.practice_count == 1)
-        not_practiced = sum(1 for p in all_problems if p.practice_count == 0)
+        stats = ProblemRepository.get_practice_level_counts(user_id)
         
         # Count practiced today and yesterday
-        practiced_today_set = set()
-        practiced_yesterday_set = set()
-        
-        for problem in all_problems:
-            # Check last_practiced
-            if problem.last_practiced:
-                if problem.last_practiced.date() == today:
-                    practiced_today_set.add(problem.id)
-                elif problem.last_practiced.date() == yesterday:
-                    practiced_yesterday_set.add(problem.id)
-            
-            # Check solved_date (if added today, counts as practiced today)
-            if problem.solved_date.date() == today:
-                practiced_today_set.add(problem.id)
-            
-            # Check history entries
-            if problem.history:
-                for entry in problem.history:
-                    entry_date = entry.practiced_at.date()
-                    if entry_date == today:
-                        practiced_today_set.add(problem.id)
-                    elif entry_date == yesterday:
-                        practiced_yesterday_set.add(problem.id)
+        practiced_today, practiced_yesterday = ProblemRepository.count_practiced_by_day(
+            user_id, yesterday_start, today_start, tomorrow_start
+        )
+        stats['practiced_today'] = practiced_today
+        stats['practiced_yesterday'] = practiced_yesterday
         
-        return {
-            'fully_practiced': fully_practiced,
-            'partially_practiced': partially_practiced,
-            'solved_once': solved_once,
-            'not_practiced': not_practiced,
-            'practiced_today': len(practiced_today_set),
-            'practiced_yesterday': len(practiced_yesterday_set),
-            'total': len(all_problems)
-        }
+        return stats
     
     @staticmethod
+    @_cached
     def get_monthly_practice_data(
         user_id: int,
         year: int,
@@ -78,19 +146,14 @@ class StatsService:
         """
         # Get date range
         days_in_month = monthrange(year, month)[1]
-        start_date = datetime(year, month, 1)
-        end_date = datetime(year, month, days_in_month, 23, 59, 59)
+        start_date = date(year, month, 1)
+        end_date = date(year, month, days_in_month)
         
-        # Get history entries for the month
-        history_entries = ProblemRepository.get_history_for_month(
+        # Count per day from the daily activity rollup
+        activity = DailyActivityRepository.get_for_date_range(
             user_id, start_date, end_date
         )
-        
-        # Count per day
-        daily_counts = {}
-        for entry in history_entries:
-            day = entry.practiced_at.day
-            daily_counts[day] = daily_counts.get(day, 0) + 1
+        daily_counts = {row.day.day: row.practices for row in activity}
         
         # Build response
         days = list(range(1, days_in_month + 1))
@@ -103,6 +166,46 @@ class StatsService:
             'month': month
         }
     
+    DIFFICULTY_PERIODS = ['today', 'week', 'month', 'year', 'lifetime']
+    
+    @staticmethod
+    def _period_starts(today) -> Dict[str, Optional[datetime]]:
+        """Get the solved_date lower bound of each difficulty stats period."""
+        # Start of current week (Monday)
+        week_start = today - timedelta(days=today.weekday())
+        
+        return {
+            'today': datetime.combine(today, datetime.min.time()),
+            'week': datetime.combine(week_start, datetime.min.time()),
+            'month': datetime(today.year, today.month, 1),
+            'year': datetime(today.year, 1, 1),
+            'lifetime': None
+        }
+    
+    @staticmethod
+    @_cached
+    def get_difficulty_stats_by_period(user_id: int) -> Dict[str, Dict[str, Any]]:
+        """
+        Get problem counts by difficulty for every period at once.
+        
+        Returns:
+            Dictionary keyed by period, each with easy, medium, hard counts.
+        """
+        today = datetime.utcnow().date()
+        counts = ProblemRepository.get_difficulty_counts(
+            user_id, StatsService._period_starts(today)
+        )
+        
+        return {
+            period: {
+                'easy': counts[period].get('easy', 0),
+                'medium': counts[period].get('medium', 0),
+                'hard': counts[period].get('hard', 0),
+                'period': period
+            }
+            for period in StatsService.DIFFICULTY_PERIODS
+        }
+    
     @staticmethod
     def get_difficulty_stats(user_id: int, period: str = 'lifetime') -> Dict[str, int]:
         """
@@ -115,49 +218,12 @@ class StatsService:
         Returns:
             Dictionary with easy, medium, hard counts.
         """
-        now = datetime.utcnow()
-        today = now.date()
-        
-        # Calculate date range based on period
-        if period == 'today':
-            start_date = datetime.combine(today, datetime.min.time())
-        elif period == 'week':
-            # Start of current week (Monday)
-            days_since_monday = today.weekday()
-            week_start = today - timedelta(days=days_since_monday)
-            start_date = datetime.combine(week_start, datetime.min.time())
-        elif period == 'month':
-            start_date = datetime(today.year, today.month, 1)
-        elif period == 'year':
-            start_date = datetime(today.year, 1, 1)
-        else:  # lifetime
-            start_date = None
-        
-        # Get all problems for user
-        all_problems = ProblemRepository.get_all_for_user(user_id)
-        
-        # Filter by date range if not lifetime
-        if start_date:
-            problems = [
-                p for p in all_problems
-                if p.solved_date and p.solved_date >= start_date
-            ]
-        else:
-            problems = all_problems
-        
-        # Count by difficulty
-        easy = sum(1 for p in problems if p.difficulty == 'easy')
-        medium = sum(1 for p in problems if p.difficulty == 'medium')
-        hard = sum(1 for p in problems if p.difficulty == 'hard')
-        
-        return {
-            'easy': easy,
-            'medium': medium,
-            'hard': hard,
-            'period': period
-        }
+        if period not in StatsService.DIFFICULTY_PERIODS:
+            period = 'lifetime'
+        return StatsService.get_difficulty_stats_by_period(user_id)[period]
     
     @staticmethod
+    @_cached
     def get_heatmap_data(user_id: int, year: int = None) -> Dict[str, Any]:
         """
         Get daily activity data for heatmap visualization.
@@ -173,28 +239,18 @@ class StatsService:
             year = datetime.utcnow().year
         
         # Get date range for the year
-        start_date = datetime(year, 1, 1)
-        end_date = datetime(year, 12, 31, 23, 59, 59)
-        
-        # Get all problems for user
-        all_problems = ProblemRepository.get_all_for_user(user_id)
-        
-        # Initialize daily counts
-        daily_counts = {}
+        start_date = date(year, 1, 1)
+        end_date = date(year, 12, 31)
         
-        # Count problems solved (first time) per day
-        for problem in all_problems:
-            if problem.solved_date and start_date <= problem.solved_date <= end_date:
-                date_str = problem.solved_date.strftime('%Y-%m-%d')
-                daily_counts[date_str] = daily_counts.get(date_str, 0) + 1
-        
-        # Also count practice sessions from history
-        history_entries = ProblemRepository.get_history_for_month(
+        # Problems solved (first time) plus practice sessions per day,
+        # read from the daily activity rollup
+        activity = DailyActivityRepository.get_for_date_range(
             user_id, start_date, end_date
         )
-        for entry in history_entries:
-            date_str = entry.practiced_at.strftime('%Y-%m-%d')
-            daily_counts[date_str] = daily_counts.get(date_str, 0) + 1
+        daily_counts = {
+            row.day.strftime('%Y-%m-%d'): row.solves + row.practices
+            for row in activity
+        }
         
         # Calculate total and streak
         total_activities = sum(daily_counts.values())
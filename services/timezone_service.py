@@ -0,0 +1,108 @@
+"""
+Timezone service - Cached timezone lookups and local-day UTC bounds.
+"""
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, time as dtime, timedelta
+from functools import lru_cache
+import threading
+from zoneinfo import ZoneInfo
+from models import User
+
+
+UTC = ZoneInfo('UTC')
+
+# Memoized per (zone key, local day); cleared when the UTC date rolls over
+_day_cache = {}
+_day_cache_date = None
+_day_cache_lock = threading.Lock()
+
+
+class TimezoneService:
+    """Service for timezone conversions shared by many users."""
+    
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def get_zone(tz_name: Optional[str]) -> ZoneInfo:
+        """Get a ZoneInfo by name, falling back to UTC for unknown names."""
+        tz_name = (tz_name or 'UTC').strip()
+        try:
+            return ZoneInfo(tz_name)
+        except Exception:
+            return UTC
+    
+    @staticmethod
+    def get_user_zone(user: User) -> ZoneInfo:
+        """Get a user's timezone."""
+        return TimezoneService.get_zone(getattr(user, 'timezone', None))
+    
+    @staticmethod
+    def local_date(zone: ZoneInfo, utc_now: datetime) -> date:
+        """Get the local date in a timezone at a naive UTC time."""
+        return utc_now.replace(tzinfo=UTC).astimezone(zone).date()
+    
+    @staticmethod
+    def group_by_zone(users: List[User]) -> Dict[ZoneInfo, List[User]]:
+        """Group users into timezone cohorts, keeping their order within each."""
+        cohorts = {}
+        for user in users:
+            cohorts.setdefault(TimezoneService.get_user_zone(user), []).append(user)
+        return cohorts
+    
+    @staticmethod
+    def day_bounds_utc(zone: ZoneInfo, local_day: date) -> Tuple[datetime, datetime]:
+        """
+        Get the naive UTC bounds of a local day [00:00, 24:00).
+        
+        Memoized per (timezone, day), as every user in a timezone shares them.
+        """
+        return TimezoneService._memoize(
+            ('bounds', zone.key, local_day),
+            lambda: TimezoneService._compute_day_bounds(zone, local_day)
+        )
+    
+    @staticmethod
+    def interval_windows(
+        zone: ZoneInfo,
+        local_today: date,
+        intervals: Tuple[int, ...]
+    ) -> Tuple[Tuple[int, datetime, datetime], ...]:
+        """
+        Get the UTC bounds of the local day `days_ago` days before local_today, per interval.
+        
+        Returns:
+            Tuple of (days_ago, start_utc_naive, end_utc_naive) tuples
+        """
+        return TimezoneService._memoize(
+            ('windows', zone.key, local_today, intervals),
+            lambda: tuple(
+                (days_ago, *TimezoneService.day_bounds_utc(zone, local_today - timedelta(days=days_ago)))
+                for days_ago in intervals
+            )
+        )
+    
+    @staticmethod
+    def _compute_day_bounds(zone: ZoneInfo, local_day: date) -> Tuple[datetime, datetime]:
+        """Convert a local day to naive UTC bounds."""
+        start_local = datetime.combine(local_day, dtime.min).replace(tzinfo=zone)
+        end_local = start_local + timedelta(days=1)
+        start_utc = start_local.astimezone(UTC).replace(tzinfo=None)
+        end_utc = end_local.astimezone(UTC).replace(tzinfo=None)
+        return start_utc, end_utc
+    
+    @staticmethod
+    def _memoize(key: tuple, compute):
+        """Get a value from the day cache, computing it on a miss."""
+        global _day_cache, _day_cache_date
+        today = datetime.utcnow().date()
+        
+        with _day_cache_lock:
+            if _day_cache_date != today:
+                _day_cache = {}
+                _day_cache_date = today
+            if key in _day_cache:
+                return _day_cache[key]
+        
+        value = compute()
+        with _day_cache_lock:
+            _day_cache[key] = value
+        return value
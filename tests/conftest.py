@@ -0,0 +1,28 @@
+"""
+Shared test fixtures.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+
+
+class TestConfig(Config):
+    """In-memory database, no outside services."""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    EMAIL_TRANSPORT = 'null'
+
+
+@pytest.fixture
+def app():
+    """Worker app (models and database only) on a fresh in-memory database."""
+    from daily_email_worker import create_worker_app
+
+    app = create_worker_app(TestConfig, migrate=True)
+    with app.app_context():
+        yield app
@@ -0,0 +1,169 @@
+"""
+Query plan checks for the hot repository queries.
+
+Each query is run against an in-memory database, and every statement it
+issues is re-run under EXPLAIN QUERY PLAN. Each statement must search
+exactly the expected index with the expected columns: a full scan, or a
+search using only an index's equality prefix, grows with every user's
+data and breaks the dashboard and the daily email worker.
+"""
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from extensions import db
+from models import User, Problem, ProblemHistory
+from repositories import ProblemRepository, UserRepository, EmailOutboxRepository
+
+FULL_SCAN = re.compile(r'SCAN (problems|problem_history|problem_counts|users|email_outbox)\b')
+
+USERS_DUE = 'SEARCH users USING INDEX ix_users_daily_email_due (daily_email_enabled=? AND next_email_due_at<?)'
+PROBLEMS_SOLVED_BETWEEN = (
+    'SEARCH problems USING INDEX ix_problems_user_solved_date (user_id=? AND solved_date>? AND solved_date<?)'
+)
+
+
+@pytest.fixture
+def data(app):
+    """One user with a practiced problem; returns (user_id, problem, now)."""
+    now = datetime.utcnow()
+    user = User(username='alice', email='alice@example.com', password_hash='x',
+                daily_email_enabled=True, next_email_due_at=now - timedelta(minutes=1))
+    db.session.add(user)
+    db.session.flush()
+    problem = Problem(user_id=user.id, title='Two Sum', difficulty='easy',
+                      leetcode_url='https://leetcode.com/problems/two-sum/',
+                      solved_date=now - timedelta(days=1), last_practiced=now)
+    db.session.add(problem)
+    db.session.flush()
+    db.session.add(ProblemHistory(problem_id=problem.id, practiced_at=now))
+    db.session.commit()
+    return user.id, problem, now
+
+
+def query_plans(fn):
+    """Run fn and return the EXPLAIN QUERY PLAN details of each statement it issued."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'WITH')):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+
+    assert statements, 'query issued no statements'
+    connection = db.session.connection()
+    return [
+        [row[-1] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+        for statement, parameters in statements
+    ]
+
+
+def assert_searches(fn, *expected):
+    """Run fn and check the SEARCH steps of each statement it issued, in order."""
+    plans = query_plans(fn)
+    assert len(plans) == len(expected), plans
+    for plan, searches in zip(plans, expected):
+        assert [step for step in plan if step.startswith('SEARCH')] == list(searches), plan
+        assert not any(FULL_SCAN.search(step) for step in plan), plan
+
+
+def test_get_problems_in_windows(data):
+    user_id, _, now = data
+    assert_searches(lambda: ProblemRepository.get_problems_in_windows(user_id, [
+        (1, now - timedelta(days=1), now),
+        (7, now - timedelta(days=8), now - timedelta(days=7)),
+    ]), [PROBLEMS_SOLVED_BETWEEN])
+
+
+def test_count_practiced_by_day(data):
+    user_id, _, now = data
+    assert_searches(lambda: ProblemRepository.count_practiced_by_day(
+        user_id, now - timedelta(days=1), now, now + timedelta(days=1)
+    ), [
+        'SEARCH problems USING COVERING INDEX ix_problems_user_last_practiced (user_id=? AND last_practiced>?)',
+        'SEARCH problem_history USING COVERING INDEX ix_problem_history_problem_practiced_at '
+        '(problem_id=? AND practiced_at>? AND practiced_at<?)',
+    ])
+
+
+def test_get_difficulty_counts(data):
+    user_id, _, now = data
+    assert_searches(lambda: ProblemRepository.get_difficulty_counts(
+        user_id, {'all': None, 'week': now - timedelta(days=7)}
+    ), [
+        'SEARCH problem_counts USING INDEX sqlite_autoindex_problem_counts_1 (user_id=?)',
+    ], [
+        'SEARCH problems USING INDEX ix_problems_user_solved_date (user_id=? AND solved_date>?)',
+    ])
+
+
+def test_get_email_items_in_windows(data):
+    user_id, _, now = data
+    assert_searches(lambda: ProblemRepository.get_email_items_in_windows([user_id], [
+        (1, now - timedelta(days=1), now),
+        (7, now - timedelta(days=8), now - timedelta(days=7)),
+    ]), [PROBLEMS_SOLVED_BETWEEN])
+
+
+def test_get_email_items_at_offsets(data):
+    user_id, problem, _ = data
+    exclude_ids = {problem.id + 1}
+    assert_searches(lambda: ProblemRepository.get_email_items_at_offsets([(user_id, 0)], exclude_ids), [
+        'SEARCH problems USING COVERING INDEX ix_problems_user_id (user_id=?)',
+        'SEARCH problems USING INTEGER PRIMARY KEY (rowid=?)',
+    ])
+
+
+def test_problem_history(data):
+    _, problem, _ = data
+    db.session.refresh(problem)  # Only the lazy load is planned below
+    assert_searches(lambda: problem.history, [
+        'SEARCH problem_history USING COVERING INDEX ix_problem_history_problem_practiced_at (problem_id=?)',
+    ])
+
+
+def test_claim_daily_email_batch(data):
+    _, _, now = data
+    assert_searches(lambda: UserRepository.claim_daily_email_batch('worker', now, 60, 10), [
+        'SEARCH users USING INTEGER PRIMARY KEY (rowid=?)',
+        USERS_DUE,
+    ], [
+        'SEARCH users USING INDEX ix_users_daily_email_lease '
+        '(daily_email_lease_owner=? AND daily_email_lease_expires_at=?)',
+    ])
+
+
+def test_get_next_daily_email_due_at(data):
+    _, _, now = data
+    assert_searches(lambda: UserRepository.get_next_daily_email_due_at(now), [
+        'SEARCH users USING COVERING INDEX ix_users_daily_email_due (daily_email_enabled=? AND next_email_due_at>?)',
+    ])
+
+
+def test_get_daily_email_due_times(data):
+    _, _, now = data
+    assert_searches(lambda: UserRepository.get_daily_email_due_times(now), [USERS_DUE])
+
+
+def test_get_stale_daily_email_users(data):
+    _, _, now = data
+    assert_searches(lambda: UserRepository.get_stale_daily_email_users(now, 10), [USERS_DUE])
+
+
+def test_email_outbox_claim_due(app):
+    EmailOutboxRepository.enqueue('alice@example.com', 'Subject', '<p>Body</p>')
+    db.session.commit()
+    assert_searches(lambda: EmailOutboxRepository.claim_due('dispatcher', 60, 10), [
+        'SEARCH email_outbox USING INDEX ix_email_outbox_status_next_attempt (status=? AND next_attempt_at<?)',
+        'SEARCH email_outbox USING COVERING INDEX ix_email_outbox_status_next_attempt '
+        '(status=? AND next_attempt_at<?)',
+    ], [
+        'SEARCH email_outbox USING INDEX ix_email_outbox_status_next_attempt (status=? AND next_attempt_at=?)',
+    ])
@@ -2,9 +2,19 @@
 Utils package - Utility functions and helpers.
 """
 from utils.decorators import require_login
-from utils.scraper import scrape_leetcode_problem
+from utils.process_local import ProcessLocal
 
 __all__ = [
     'require_login',
     'scrape_leetcode_problem',
+    'ProcessLocal',
 ]
+
+
+def __getattr__(name):
+    # The scraper pulls in requests and BeautifulSoup, which the daily
+    # email worker never needs, so it is only imported when asked for
+    if name == 'scrape_leetcode_problem':
+        from utils.scraper import scrape_leetcode_problem
+        return scrape_leetcode_problem
+    raise AttributeError(f"module 'utils' has no attribute {name!r}")
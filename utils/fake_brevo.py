@@ -0,0 +1,155 @@
+"""
+Local stand-in for the Brevo transactional email API.
+
+Accepts POST /v3/smtp/email like Brevo does, with configurable latency and
+error rate, so the daily email worker can be benchmarked end to end without
+sending real email. Point BREVO_API_HOST at it:
+
+    python -m utils.fake_brevo --port 8025 --latency-ms 80 --error-rate 0.01
+    BREVO_API_HOST=http://127.0.0.1:8025/v3 python daily_email_worker.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+class _FakeBrevoHandler(BaseHTTPRequestHandler):
+    """Request handler for FakeBrevoServer."""
+    
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+    
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        server = self.server.fake_brevo
+        
+        if self.path.rstrip('/') != '/v3/smtp/email':
+            self._reply(404, {'code': 'not_found', 'message': 'Invalid route'})
+            return
+        
+        if server.latency_ms:
+            time.sleep(server.latency_ms / 1000.0)
+        
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            self._reply(400, {'code': 'bad_request', 'message': 'Invalid JSON'})
+            return
+        
+        messages = len(payload.get('messageVersions') or []) or 1
+        if server.error_rate and server.rng.random() < server.error_rate:
+            server.record(messages, failed=True)
+            self._reply(500, {'code': 'internal_error', 'message': 'Injected failure'})
+            return
+        
+        server.record(messages, failed=False)
+        if payload.get('messageVersions'):
+            self._reply(201, {'messageIds': [f'<{uuid.uuid4().hex}@fake-brevo>' for _ in range(messages)]})
+        else:
+            self._reply(201, {'messageId': f'<{uuid.uuid4().hex}@fake-brevo>'})
+    
+    def _reply(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeBrevoServer:
+    """
+    In-process fake Brevo API server.
+    
+    Args:
+        port: Port to listen on (defaults to any free port)
+        latency_ms: Delay added to every request
+        error_rate: Fraction of requests answered with HTTP 500
+        seed: Random seed for the injected errors
+    """
+    
+    def __init__(
+        self,
+        port: int = 0,
+        latency_ms: float = 0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.messages = 0
+        self.failed_requests = 0
+        self.failed_messages = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', port), _FakeBrevoHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake_brevo = self
+    
+    @property
+    def host(self) -> str:
+        """API base URL to use as BREVO_API_HOST."""
+        return f'http://127.0.0.1:{self._httpd.server_port}/v3'
+    
+    def record(self, messages: int, failed: bool) -> None:
+        """Count one handled request."""
+        with self._lock:
+            self.requests += 1
+            self.messages += messages
+            if failed:
+                self.failed_requests += 1
+                self.failed_messages += messages
+    
+    def start(self) -> 'FakeBrevoServer':
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+    
+    def serve_forever(self) -> None:
+        """Serve requests on the current thread until interrupted."""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+
+def main() -> None:
+    """Run the fake server from the command line."""
+    parser = argparse.ArgumentParser(description='Run a local fake Brevo API server.')
+    parser.add_argument('--port', type=int, default=8025)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    
+    server = FakeBrevoServer(args.port, args.latency_ms, args.error_rate)
+    print(f"Fake Brevo listening on {server.host} "
+          f"(latency {args.latency_ms:g}ms, error rate {args.error_rate:g})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"Handled {server.requests} requests ({server.messages} emails, "
+          f"{server.failed_requests} failed requests)")
+
+
+if __name__ == '__main__':
+    main()
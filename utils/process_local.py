@@ -0,0 +1,59 @@
+"""
+Per-process shared values that are rebuilt in forked children.
+"""
+import os
+import threading
+import weakref
+from typing import Any, Callable, Hashable, Optional
+
+# Every ProcessLocal, so a forked child can reset them all at once
+_instances = weakref.WeakSet()
+
+
+class ProcessLocal:
+    """
+    A value created on first use and shared by all threads of a process.
+    
+    Used for clients that hold connection pools or background threads.
+    Neither survives a fork (e.g. into a gunicorn worker), so the value
+    and its lock, which another thread may have been holding, are dropped
+    in the child and recreated there on first use.
+    """
+    
+    def __init__(self):
+        self._entry = None  # (key, value)
+        self._lock = threading.Lock()
+        _instances.add(self)
+    
+    def get(self, factory: Callable[[], Any], key: Optional[Hashable] = None) -> Any:
+        """
+        Get the value, calling factory to create it on first use.
+        
+        The value is also recreated if key differs from the one it was
+        created with (e.g. a changed API key).
+        """
+        entry = self._entry
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        
+        with self._lock:
+            entry = self._entry
+            if entry is None or entry[0] != key:
+                entry = (key, factory())
+                self._entry = entry
+            return entry[1]
+    
+    def _reset(self) -> None:
+        """Forget the value and replace the lock."""
+        self._entry = None
+        self._lock = threading.Lock()
+
+
+def _reset_all() -> None:
+    """Reset every ProcessLocal in a forked child."""
+    for instance in list(_instances):
+        instance._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_all)
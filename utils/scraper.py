@@ -1,18 +1,130 @@
 """
 Leetcode problem scraper.
 """
+import gzip
+import hashlib
+import json
+import os
 import re
+import tempfile
 import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
+from flask import current_app, has_app_context
 from urllib.parse import urlparse
 from typing import Optional, Dict
+from utils.process_local import ProcessLocal
+
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate',
+}
+
+# Bumped when the cached result format or extraction logic changes
+CACHE_VERSION = 1
+
+class _CappedRetry(Retry):
+    """Retry whose waits, including a server's Retry-After, never exceed MAX_WAIT_SECONDS."""
+    
+    MAX_WAIT_SECONDS = 2
+    
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.MAX_WAIT_SECONDS)
+
+
+# Process-wide session
+_session = ProcessLocal()
+
+
+def _get_session() -> requests.Session:
+    """
+    Get the process-wide HTTP session, creating it on first use.
+    
+    The session keeps connections to Leetcode alive between adds, and
+    retries 429 and 5xx responses twice with exponential backoff before
+    giving up. Scrapes run on web requests, so every wait (including a
+    server's Retry-After) is capped and slow reads are not retried:
+    retries add at most a few seconds.
+    """
+    return _session.get(_create_session)
+
+
+def _create_session() -> requests.Session:
+    """Build the HTTP session with its retrying connection pool."""
+    retry = _CappedRetry(
+        total=2,
+        read=0,
+        backoff_factor=0.5,
+        backoff_max=_CappedRetry.MAX_WAIT_SECONDS,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=retry)
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def _cache_path(url: str) -> Optional[str]:
+    """Get the on-disk cache file for a URL, or None if caching is off."""
+    cache_dir = current_app.config.get('SCRAPER_CACHE_DIR') if has_app_context() else None
+    if not cache_dir:
+        return None
+    key = hashlib.sha256(url.encode()).hexdigest()
+    return os.path.join(cache_dir, f'{key}.json.gz')
+
+
+def _read_cache(path: Optional[str]) -> Optional[dict]:
+    """Load a cache entry, ignoring missing, corrupt or outdated ones."""
+    if not path:
+        return None
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return entry if entry.get('version') == CACHE_VERSION else None
+
+
+def _write_cache(path: Optional[str], entry: dict) -> None:
+    """Atomically write a cache entry; the cache is best effort."""
+    if not path:
+        return
+    tmp_path = None
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', encoding='utf-8') as f:
+            json.dump(dict(entry, version=CACHE_VERSION), f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not write scraper cache: {e}")
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
 
 def scrape_leetcode_problem(url: str) -> Optional[Dict[str, str]]:
     """
     Scrape Leetcode problem page to extract title and difficulty.
     
+    Pages are fetched through a pooled session and cached on disk
+    (SCRAPER_CACHE_DIR) with their ETag and Last-Modified validators, so
+    fetching a page again is a conditional request: when Leetcode answers
+    304 Not Modified, the cached result is returned without downloading
+    or parsing the page.
+    
     Args:
         url: Leetcode problem URL
     
@@ -21,13 +133,18 @@ def scrape_leetcode_problem(url: str) -> Optional[Dict[str, str]]:
     """
     try:
         # First try with requests (faster)
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-        }
+        cache_path = _cache_path(url)
+        cached = _read_cache(cache_path)
+        
+        headers = {}
+        if cached and cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached and cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
         
-        response = requests.get(url, headers=headers, timeout=15)
+        response = _get_session().get(url, headers=headers, timeout=15)
+        if response.status_code == 304 and cached:
+            return cached['result']
         response.raise_for_status()
         
         soup = BeautifulSoup(response.content, 'html.parser')
@@ -43,7 +160,17 @@ def scrape_leetcode_problem(url: str) -> Optional[Dict[str, str]]:
         if not title or len(title) < 3:
             return None
         
-        return {'title': title, 'difficulty': difficulty or 'medium'}
+        result = {'title': title, 'difficulty': difficulty or 'medium'}
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            _write_cache(cache_path, {
+                'url': url,
+                'etag': etag,
+                'last_modified': last_modified,
+                'result': result,
+            })
+        return result
     
     except requests.exceptions.RequestException as e:
         print(f"Error fetching Leetcode page: {e}")